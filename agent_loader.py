@@ -0,0 +1,393 @@
+import ast
+import hashlib
+import importlib.abc
+import importlib.util
+import json
+import logging
+import marshal
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import CodeType
+
+from maa.custom_action import CustomAction
+from maa.custom_recognition import CustomRecognition
+
+logger = logging.getLogger(__name__)
+
+AGENT_CACHE_DIR = "config/agent_cache"
+CACHE_VERSION = 3
+# 超过该数量的待解析文件才使用线程池
+PARALLEL_THRESHOLD = 8
+
+REGISTER_DECORATORS = {
+    "custom_action": "action",
+    "custom_recognition": "recognition",
+}
+
+
+def _references_agent_server(node: ast.AST) -> bool:
+    return any(
+        isinstance(child, ast.Name) and child.id == "AgentServer"
+        for child in ast.walk(node)
+    )
+
+
+class AgentServerStripper(ast.NodeTransformer):
+    """移除 AgentServer 相关的装饰器、导入与调用，避免注册时重复绑定
+
+    被移除的语句替换为 pass，保持语法块完整且行号不变。
+    """
+
+    def _strip_decorators(self, node):
+        node.decorator_list = [
+            decorator
+            for decorator in node.decorator_list
+            if not _references_agent_server(decorator)
+        ]
+        return self.generic_visit(node)
+
+    visit_ClassDef = _strip_decorators
+    visit_FunctionDef = _strip_decorators
+    visit_AsyncFunctionDef = _strip_decorators
+
+    def _strip_import(self, node):
+        node.names = [
+            alias
+            for alias in node.names
+            if (alias.asname or alias.name.rpartition(".")[2]) != "AgentServer"
+        ]
+        if node.names:
+            return node
+        return ast.copy_location(ast.Pass(), node)
+
+    visit_Import = _strip_import
+    visit_ImportFrom = _strip_import
+
+    def _strip_statement(self, node):
+        if _references_agent_server(node):
+            return ast.copy_location(ast.Pass(), node)
+        return node
+
+    visit_Expr = _strip_statement
+    visit_Assign = _strip_statement
+
+
+def _module_level_classes(body: list[ast.stmt]):
+    """遍历模块作用域内的类定义，包括 if/try/with 等语句块内定义的类
+
+    函数体与类体内定义的类不是模块属性，注册时无法通过 getattr 取到，因此不进入。
+    """
+    for node in body:
+        if isinstance(node, ast.ClassDef):
+            yield node
+        elif not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            for name in ("body", "orelse", "finalbody"):
+                block = getattr(node, name, None)
+                if isinstance(block, list):
+                    yield from _module_level_classes(block)
+            for child in getattr(node, "handlers", []) + getattr(node, "cases", []):
+                yield from _module_level_classes(child.body)
+
+
+def find_registrations(tree: ast.Module) -> list[dict]:
+    """收集模块作用域内被 @AgentServer.custom_action/custom_recognition 装饰的类"""
+    registrations = []
+    for node in _module_level_classes(tree.body):
+        for decorator in node.decorator_list:
+            if not (
+                isinstance(decorator, ast.Call)
+                and isinstance(decorator.func, ast.Attribute)
+                and isinstance(decorator.func.value, ast.Name)
+                and decorator.func.value.id == "AgentServer"
+                and decorator.func.attr in REGISTER_DECORATORS
+                and decorator.args
+                and isinstance(decorator.args[0], ast.Constant)
+                and isinstance(decorator.args[0].value, str)
+            ):
+                continue
+            registrations.append(
+                {
+                    "kind": REGISTER_DECORATORS[decorator.func.attr],
+                    "name": decorator.args[0].value,
+                    "class_name": node.name,
+                }
+            )
+    return registrations
+
+
+def analyze_agent_file(file_path: str) -> tuple[list[dict], CodeType]:
+    """读取并解析一次源码，同时得到注册列表与过滤后的 code object"""
+    with open(file_path, "r", encoding="utf-8") as f:
+        source = f.read()
+    tree = ast.parse(source, file_path)
+    registrations = find_registrations(tree)
+    if "AgentServer" in source:
+        tree = ast.fix_missing_locations(AgentServerStripper().visit(tree))
+    return registrations, compile(tree, file_path, "exec")
+
+
+class AgentCache:
+    """Agent 扫描结果与编译结果缓存
+
+    以文件路径、修改时间和大小为键，保存模块映射、注册列表以及过滤后源码的
+    code object，未变化的文件无需重新读取和编译。
+    """
+
+    def __init__(self, agent_dir: Path, cache_dir: str = AGENT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.index_path = self.cache_dir / "index.json"
+        self._key = f"{CACHE_VERSION}|{importlib.util.MAGIC_NUMBER.hex()}|{agent_dir}"
+        self._files: dict[str, dict] = {}
+        self._codes: dict[str, CodeType] = {}
+        self._dirty = False
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("key") == self._key:
+                self._files = data.get("files", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"读取 Agent 缓存失败，将重新扫描: {e}")
+
+    def _code_path(self, file_path: str) -> Path:
+        name = hashlib.sha1(file_path.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{name}.bin"
+
+    def lookup(self, file_path: str, stat: os.stat_result) -> dict | None:
+        record = self._files.get(file_path)
+        if (
+            record
+            and record["mtime_ns"] == stat.st_mtime_ns
+            and record["size"] == stat.st_size
+        ):
+            return record
+        return None
+
+    def update(
+        self,
+        file_path: str,
+        stat: os.stat_result,
+        registrations: list,
+        code: CodeType,
+    ):
+        self._files[file_path] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "registrations": registrations,
+        }
+        self._codes[file_path] = code
+        self._dirty = True
+
+    def load_code(self, file_path: str) -> CodeType | None:
+        if file_path in self._codes:
+            return self._codes[file_path]
+        if file_path not in self._files:
+            return None
+        try:
+            with open(self._code_path(file_path), "rb") as f:
+                return marshal.load(f)
+        except Exception:
+            return None
+
+    def save(self, file_paths):
+        """保存索引与新编译的 code object，并丢弃已不存在的文件记录"""
+        stale = set(self._files) - set(file_paths)
+        for file_path in stale:
+            del self._files[file_path]
+            self._code_path(file_path).unlink(missing_ok=True)
+        if not self._dirty and not stale:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for file_path, code in self._codes.items():
+                if file_path in self._files:
+                    with open(self._code_path(file_path), "wb") as f:
+                        marshal.dump(code, f)
+            self._codes.clear()
+            temp_path = self.index_path.with_suffix(".tmp")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": self._key, "files": self._files}, f)
+            os.replace(temp_path, self.index_path)
+            self._dirty = False
+        except Exception as e:
+            logger.warning(f"写入 Agent 缓存失败: {e}")
+
+
+def scan_agent_modules(agent_dir: Path, cache: AgentCache) -> tuple[dict, dict]:
+    """扫描所有 .py 文件建立模块映射，并收集需要注册的类"""
+    module_map = {}  # module_name -> {path, is_pkg}
+    to_register = {"action": [], "recognition": []}
+    for file_path in agent_dir.glob("**/*.py"):
+        try:
+            relative_path = file_path.relative_to(agent_dir)
+            if file_path.name == "__init__.py":
+                module_name = (
+                    str(relative_path.parent).replace(os.sep, ".").replace("/", ".")
+                )
+                if module_name in {"", "."}:
+                    continue
+                is_pkg = True
+            else:
+                module_name = (
+                    str(relative_path.with_suffix(""))
+                    .replace(os.sep, ".")
+                    .replace("/", ".")
+                )
+                is_pkg = False
+        except ValueError:
+            continue
+        if not module_name:
+            continue
+        module_map[module_name] = {"path": str(file_path), "is_pkg": is_pkg}
+
+    # 未命中缓存的文件交给线程池解析，每个文件只读取一次
+    registrations: dict[str, list] = {}
+    pending = []
+    for module_name, info in module_map.items():
+        try:
+            stat = os.stat(info["path"])
+        except OSError as e:
+            print(f"Error scanning {info['path']}: {e}")
+            continue
+        record = cache.lookup(info["path"], stat)
+        if record is None:
+            pending.append((module_name, info["path"], stat))
+        else:
+            registrations[module_name] = record["registrations"]
+
+    def analyze(item):
+        module_name, path, stat = item
+        try:
+            return module_name, path, stat, analyze_agent_file(path)
+        except Exception as e:
+            print(f"Error scanning {path}: {e}")
+            return module_name, path, stat, None
+
+    if len(pending) > PARALLEL_THRESHOLD:
+        with ThreadPoolExecutor() as executor:
+            results = list(executor.map(analyze, pending))
+    else:
+        results = [analyze(item) for item in pending]
+    for module_name, path, stat, result in results:
+        if result is None:
+            continue
+        cache.update(path, stat, *result)
+        registrations[module_name] = result[0]
+
+    for module_name in module_map:
+        for item in registrations.get(module_name, []):
+            to_register[item["kind"]].append(
+                {
+                    "name": item["name"],
+                    "class_name": item["class_name"],
+                    "module_name": module_name,
+                }
+            )
+    return module_map, to_register
+
+
+class AgentLoader(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """自定义 Loader，利用 importlib 规范支持循环 / 相互导入"""
+
+    def __init__(self, mapping, cache: AgentCache):
+        self.mapping = mapping
+        self.cache = cache
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname not in self.mapping:
+            return None
+        record = self.mapping[fullname]
+        if record["is_pkg"]:
+            return importlib.util.spec_from_file_location(
+                fullname,
+                record["path"],
+                loader=self,
+                submodule_search_locations=[os.path.dirname(record["path"])],
+            )
+        return importlib.util.spec_from_file_location(
+            fullname, record["path"], loader=self
+        )
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, module):
+        record = self.mapping[module.__name__]
+        file_path = record["path"]
+        code = self.cache.load_code(file_path)
+        if code is None:
+            _, code = analyze_agent_file(file_path)
+
+        module.__file__ = file_path
+        module.__loader__ = self
+        if record["is_pkg"]:
+            module.__package__ = module.__name__
+            module.__path__ = [os.path.dirname(file_path)]
+        else:
+            module.__package__ = module.__name__.rpartition(".")[0]
+
+        exec(code, module.__dict__)
+
+
+class LazyAgentTarget:
+    """首次调用时才导入模块并实例化真实的自定义类，并记录首次调用耗时"""
+
+    def __init__(self, name: str, module_name: str, class_name: str, on_loaded=None):
+        self.name = name
+        self.module_name = module_name
+        self.class_name = class_name
+        self.on_loaded = on_loaded
+        self.first_call_latency: float | None = None
+        self._instance = None
+        self._error: Exception | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def error(self) -> Exception | None:
+        """导入或实例化失败时的异常"""
+        return self._error
+
+    def resolve(self):
+        if self._instance is not None:
+            return self._instance
+        with self._lock:
+            if self._instance is None and self._error is None:
+                start = time.perf_counter()
+                try:
+                    module = importlib.import_module(self.module_name)
+                    self._instance = getattr(module, self.class_name)()
+                except Exception as e:
+                    self._error = e
+                    logger.exception(f"加载自定义 {self.name} 失败")
+                self.first_call_latency = time.perf_counter() - start
+                if self.on_loaded:
+                    self.on_loaded(self)
+        return self._instance
+
+
+class LazyCustomAction(CustomAction):
+    def __init__(self, target: LazyAgentTarget):
+        super().__init__()
+        self.target = target
+
+    def run(self, context, argv):
+        instance = self.target.resolve()
+        if instance is None:
+            return False
+        return instance.run(context, argv)
+
+
+class LazyCustomRecognition(CustomRecognition):
+    def __init__(self, target: LazyAgentTarget):
+        super().__init__()
+        self.target = target
+
+    def analyze(self, context, argv):
+        instance = self.target.resolve()
+        if instance is None:
+            return None
+        return instance.analyze(context, argv)
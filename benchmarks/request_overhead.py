@@ -0,0 +1,145 @@
+"""
+单次请求额外开销基准
+
+    python benchmarks/request_overhead.py [--requests N]
+
+分别构建使用 HTTP 中间件实现 SPA 回退（旧方式）与使用路由器默认处理器实现
+SPA 回退（当前方式）的两个应用，直接以 ASGI 方式调用，统计 /api 接口、
+静态文件、流式响应以及回退页面的平均耗时。
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+
+INDEX = "<html>index</html>"
+STREAM_CHUNKS = 50
+
+
+def build_app(assets_dir: str, use_middleware: bool) -> FastAPI:
+    app = FastAPI()
+    app.mount("/assets", StaticFiles(directory=assets_dir))
+
+    if use_middleware:
+
+        @app.middleware("http")
+        async def spa_middleware(request: Request, call_next):
+            response = await call_next(request)
+            if response.status_code == 404 and not (
+                request.url.path.startswith("/api/")
+                or request.url.path.startswith("/assets/")
+            ):
+                return HTMLResponse(INDEX)
+            return response
+
+    else:
+
+        async def spa_fallback(scope, receive, send):
+            if scope["type"] == "http" and not scope["path"].startswith(
+                ("/api/", "/assets/")
+            ):
+                await HTMLResponse(INDEX)(scope, receive, send)
+                return
+            await app.router.not_found(scope, receive, send)
+
+        app.router.default = spa_fallback
+
+    @app.get("/api/ping")
+    def ping():
+        return {"status": "success"}
+
+    @app.get("/api/stream")
+    async def stream():
+        async def generator():
+            for _ in range(STREAM_CHUNKS):
+                yield b"data: x\n\n"
+
+        return StreamingResponse(generator(), media_type="text/event-stream")
+
+    return app
+
+
+async def request(app, path: str) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+    status = 0
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            # 模拟保持连接的客户端，响应结束前不会断开
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def measure(app, path: str, count: int) -> float:
+    for _ in range(min(count, 100)):
+        await request(app, path)
+    start = time.perf_counter()
+    for _ in range(count):
+        await request(app, path)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+async def run(count: int):
+    with tempfile.TemporaryDirectory() as assets_dir:
+        with open(os.path.join(assets_dir, "index-abc12345.js"), "w") as f:
+            f.write("console.log(1);" * 200)
+        apps = {
+            "middleware": build_app(assets_dir, True),
+            "fallback": build_app(assets_dir, False),
+        }
+        paths = ["/api/ping", "/assets/index-abc12345.js", "/api/stream", "/settings"]
+        print(f"{'path':<28}{'middleware(us)':>16}{'fallback(us)':>16}{'diff':>10}")
+        for path in paths:
+            results = {}
+            for name, app in apps.items():
+                status = await request(app, path)
+                if status != 200:
+                    sys.exit(f"{name} {path} 返回 {status}")
+                results[name] = await measure(app, path, count)
+            diff = results["middleware"] - results["fallback"]
+            print(
+                f"{path:<28}{results['middleware']:>16.1f}"
+                f"{results['fallback']:>16.1f}{diff:>+10.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+资源包加载耗时基准
+
+在项目目录（含 interface.json）下运行:
+    python benchmarks/resource_load.py [资源名] [--rounds N]
+
+分别统计冷启动（无校验缓存）与热启动（有校验缓存）时的指纹与 pipeline 校验耗时，
+以及 MaaFramework 实际加载资源包的耗时。指纹只读取文件大小与修改时间，
+同一进程内重复选择已加载资源时只需要指纹耗时。
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from maa.resource import Resource  # noqa: E402
+
+from resource_cache import ResourceCache, bundle_fingerprint  # noqa: E402
+
+
+def measure(paths: list[str], cache_path: str) -> tuple[float, float, float]:
+    start = time.perf_counter()
+    for path in paths:
+        bundle_fingerprint(path)
+    fingerprint_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cache = ResourceCache(cache_path)
+    cache.check_pipeline(paths)
+    cache.save()
+    check_time = time.perf_counter() - start
+
+    resource = Resource()
+    resource.set_cpu()
+    start = time.perf_counter()
+    for path in paths:
+        resource.post_bundle(path).wait()
+    load_time = time.perf_counter() - start
+    return fingerprint_time, check_time, load_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="资源包冷/热加载耗时基准")
+    parser.add_argument("name", nargs="?", help="资源名，默认使用第一个资源")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with open("interface.json", "r", encoding="utf-8") as f:
+        interface = json.load(f)
+    item = next(
+        (i for i in interface["resource"] if args.name in (None, i["name"])), None
+    )
+    if item is None:
+        sys.exit(f"未找到资源: {args.name}")
+    paths = [
+        os.path.realpath(path.replace("{PROJECT_DIR}", os.getcwd()))
+        for path in item["path"]
+    ]
+
+    results = {"cold": [], "warm": []}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_path = os.path.join(temp_dir, "resource_cache.json")
+        for _ in range(args.rounds):
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+            results["cold"].append(measure(paths, cache_path))
+            results["warm"].append(measure(paths, cache_path))
+
+    print(f"资源: {item['name']}，轮数: {args.rounds}")
+    for kind, samples in results.items():
+        fingerprint_time, check_time, load_time = (
+            statistics.median(sample[index] for sample in samples) for index in range(3)
+        )
+        total = fingerprint_time + check_time + load_time
+        print(
+            f"{kind:>4}: 指纹 {fingerprint_time * 1000:8.1f} ms  "
+            f"校验 {check_time * 1000:8.1f} ms  "
+            f"加载 {load_time * 1000:8.1f} ms  "
+            f"合计 {total * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
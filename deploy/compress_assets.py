@@ -0,0 +1,38 @@
+import gzip
+import os
+import sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 为前端构建产物生成 .br/.gz 预压缩文件，由 PrecompressedStaticFiles 按需返回
+COMPRESSIBLE = {".js", ".mjs", ".css", ".html", ".json", ".svg", ".txt", ".wasm"}
+MIN_SIZE = 1024
+
+root = Path(sys.argv[1] if len(sys.argv) > 1 else "page")
+if brotli is None:
+    print("brotli 未安装，仅生成 .gz 文件")
+
+count = 0
+for path in root.rglob("*"):
+    if not path.is_file() or path.suffix not in COMPRESSIBLE:
+        continue
+    data = path.read_bytes()
+    if len(data) < MIN_SIZE:
+        continue
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    for suffix, compressed in variants.items():
+        # 压缩后没有变小的文件不保留
+        if len(compressed) >= len(data):
+            continue
+        target = path.with_name(path.name + suffix)
+        target.write_bytes(compressed)
+        os.utime(target, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns))
+        count += 1
+
+print(f"已生成 {count} 个预压缩文件")
@@ -0,0 +1,360 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import deque
+from typing import Callable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+# 小于该大小的文件不分段下载
+SEGMENT_MIN_SIZE = 8 * 1024 * 1024
+MAX_SEGMENTS = 8
+# 连接中断后从断点重试的次数与间隔（秒）
+MAX_RETRIES = 5
+RETRY_DELAY = 2
+# 进度回调的最短间隔（秒）
+PROGRESS_INTERVAL = 0.5
+# 下载速度按最近一段时间（秒）的平均值计算
+RATE_WINDOW = 5.0
+
+
+class DownloadProgress:
+    """下载进度，回调参数包含已下载字节数、总大小、速度与剩余时间"""
+
+    def __init__(
+        self,
+        total: Optional[int] = None,
+        callback: Optional[Callable[[dict], None]] = None,
+    ):
+        self.total = total
+        self.downloaded = 0
+        self.callback = callback
+        self._samples: deque[tuple[float, int]] = deque([(time.monotonic(), 0)])
+        self._reported = 0.0
+
+    def add(self, size: int):
+        self.downloaded += size
+        now = time.monotonic()
+        if now - self._reported >= PROGRESS_INTERVAL:
+            self._reported = now
+            self._samples.append((now, self.downloaded))
+            while len(self._samples) > 2 and now - self._samples[1][0] > RATE_WINDOW:
+                self._samples.popleft()
+            self.report()
+
+    def skip(self, size: int):
+        """计入续传前已下载的部分，不影响下载速度"""
+        self.downloaded += size
+        self._samples = deque((t, n + size) for t, n in self._samples)
+
+    def reset(self):
+        self.downloaded = 0
+        self._samples = deque([(time.monotonic(), 0)])
+
+    def rate(self) -> float:
+        start, downloaded = self._samples[0]
+        elapsed = time.monotonic() - start
+        return (self.downloaded - downloaded) / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        rate = self.rate()
+        eta = None
+        if self.total and rate > 0:
+            eta = max(self.total - self.downloaded, 0) / rate
+        return {
+            "downloaded": self.downloaded,
+            "total": self.total,
+            "rate": rate,
+            "eta": eta,
+        }
+
+    def report(self):
+        if self.callback:
+            self.callback(self.as_dict())
+
+
+async def download(
+    url: str,
+    dest: str,
+    proxy: Optional[str] = None,
+    expected_hash: str = "",
+    expected_size: Optional[int] = None,
+    segments: int = 1,
+    on_progress: Optional[Callable[[dict], None]] = None,
+) -> str:
+    """下载文件到 dest，返回 SHA-256
+
+    未完成的数据保存在 dest 旁以 URL 区分的 .part 文件中，连接中断或重新下载时
+    通过 Range 请求从断点继续。segments 大于 1 且服务器支持 Range 时，
+    大文件会拆成多段，在同一个连接池中并行下载。
+    已知文件大小时大小不符会立即中止；给出期望哈希时校验失败会删除文件。
+    """
+    part_prefix = f"{dest}.{hashlib.sha1(url.encode()).hexdigest()[:8]}.part"
+    _remove_stale_parts(dest, part_prefix)
+    progress = DownloadProgress(expected_size, on_progress)
+    segments = min(max(segments, 1), MAX_SEGMENTS)
+    connections = segments
+    async with httpx.AsyncClient(
+        follow_redirects=True,
+        proxy=proxy or None,
+        # 续传按原始字节偏移计算，不接受压缩编码
+        headers={"Accept-Encoding": "identity"},
+        limits=httpx.Limits(
+            max_connections=connections, max_keepalive_connections=connections
+        ),
+        timeout=httpx.Timeout(30),
+    ) as client:
+        total, ranges = expected_size, False
+        if segments > 1:
+            total, ranges = await _probe(client, url)
+            _check_size(expected_size, total)
+        if ranges and total and total >= SEGMENT_MIN_SIZE:
+            progress.total = total
+            file_hash = await _download_segments(
+                client, url, dest, part_prefix, total, segments, progress
+            )
+        else:
+            file_hash = await _download_stream(
+                client, url, dest, part_prefix, expected_size, progress
+            )
+    progress.report()
+    if expected_hash and file_hash != expected_hash.lower():
+        os.remove(dest)
+        raise ValueError("文件哈希校验失败，下载的文件可能已损坏。")
+    return file_hash
+
+
+async def _probe(client: httpx.AsyncClient, url: str) -> tuple[Optional[int], bool]:
+    """用 1 字节的 Range 请求探测文件大小与服务器是否支持 Range"""
+    async with client.stream("GET", url, headers={"Range": "bytes=0-0"}) as resp:
+        resp.raise_for_status()
+        if resp.status_code == 206:
+            total = _content_range_total(resp)
+            return total, total is not None
+        return _content_length(resp), False
+
+
+async def _download_stream(
+    client: httpx.AsyncClient,
+    url: str,
+    dest: str,
+    part_prefix: str,
+    expected_size: Optional[int],
+    progress: DownloadProgress,
+) -> str:
+    """单连接下载，边下载边计算哈希，中断后从断点续传"""
+    part = part_prefix
+    # 之前分段下载留下的分段文件无法用于单连接续传
+    _remove_parts(part_prefix, keep=[part])
+    sha256 = hashlib.sha256()
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    if expected_size and offset > expected_size:
+        offset = 0
+    if offset:
+        # 续传时先补算已下载部分的哈希
+        await asyncio.to_thread(_hash_file, part, sha256)
+        progress.skip(offset)
+        logger.info(f"从 {offset} 字节处继续下载 {url}")
+
+    attempt = 0
+    while True:
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            async with client.stream("GET", url, headers=headers) as resp:
+                if resp.status_code == 416:
+                    total = _content_range_total(resp)
+                    if total is not None and total == offset:
+                        break
+                    # 已下载的部分与服务器上的文件不一致，从头下载
+                    offset = 0
+                    sha256 = hashlib.sha256()
+                    progress.reset()
+                    continue
+                resp.raise_for_status()
+                if offset and resp.status_code != 206:
+                    # 服务器不支持 Range，从头下载
+                    offset = 0
+                    sha256 = hashlib.sha256()
+                    progress.reset()
+                total = _content_range_total(resp)
+                if total is None:
+                    length = _content_length(resp)
+                    total = length + offset if length is not None else None
+                _check_size(expected_size, total)
+                if progress.total is None:
+                    progress.total = total
+                with open(part, "ab" if offset else "wb") as f:
+                    async for chunk in resp.aiter_bytes(CHUNK_SIZE):
+                        offset += len(chunk)
+                        if expected_size and offset > expected_size:
+                            f.close()
+                            os.remove(part)
+                            raise ValueError(
+                                f"文件大小不符: 已接收的数据超出 {expected_size} 字节"
+                            )
+                        sha256.update(chunk)
+                        f.write(chunk)
+                        progress.add(len(chunk))
+            break
+        except httpx.TransportError as e:
+            attempt += 1
+            if attempt > MAX_RETRIES:
+                raise
+            logger.warning(
+                f"下载中断，{RETRY_DELAY} 秒后从 {offset} 字节处继续"
+                f" ({attempt}/{MAX_RETRIES}): {e}"
+            )
+            await asyncio.sleep(RETRY_DELAY)
+
+    if expected_size and offset != expected_size:
+        raise ValueError(f"文件大小不符: 期望 {expected_size} 字节，实际 {offset} 字节")
+    os.replace(part, dest)
+    return sha256.hexdigest()
+
+
+async def _download_segments(
+    client: httpx.AsyncClient,
+    url: str,
+    dest: str,
+    part_prefix: str,
+    total: int,
+    segments: int,
+    progress: DownloadProgress,
+) -> str:
+    """分段并行下载，各段分别续传，全部完成后合并并计算哈希
+
+    分段数量相同时复用上次留下的分段文件续传，分段方式不同的文件会被删除。
+    连接中断或下载被取消时保留分段文件以便下次续传，其他错误时删除。
+    """
+    size = -(-total // segments)
+    ranges = [(start, min(start + size, total) - 1) for start in range(0, total, size)]
+    parts = [f"{part_prefix}{index}of{len(ranges)}" for index in range(len(ranges))]
+    _remove_parts(part_prefix, keep=parts)
+    tasks = [
+        asyncio.create_task(_download_range(client, url, part, start, end, progress))
+        for part, (start, end) in zip(parts, ranges)
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException as e:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if not isinstance(e, (httpx.TransportError, asyncio.CancelledError)):
+            _remove_parts(part_prefix)
+        raise
+    return await asyncio.to_thread(_merge_parts, parts, dest)
+
+
+async def _download_range(
+    client: httpx.AsyncClient,
+    url: str,
+    part: str,
+    start: int,
+    end: int,
+    progress: DownloadProgress,
+):
+    length = end - start + 1
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    if offset > length:
+        offset = 0
+    progress.skip(offset)
+
+    attempt = 0
+    while offset < length:
+        try:
+            headers = {"Range": f"bytes={start + offset}-{end}"}
+            async with client.stream("GET", url, headers=headers) as resp:
+                resp.raise_for_status()
+                if resp.status_code != 206:
+                    raise ValueError("服务器不支持分段下载")
+                with open(part, "ab" if offset else "wb") as f:
+                    async for chunk in resp.aiter_bytes(CHUNK_SIZE):
+                        if offset + len(chunk) > length:
+                            raise ValueError("分段下载返回的数据超出请求范围")
+                        f.write(chunk)
+                        offset += len(chunk)
+                        progress.add(len(chunk))
+            if offset < length:
+                raise httpx.RemoteProtocolError("分段数据不完整")
+        except httpx.TransportError as e:
+            attempt += 1
+            if attempt > MAX_RETRIES:
+                raise
+            logger.warning(
+                f"分段 {start}-{end} 下载中断，{RETRY_DELAY} 秒后继续"
+                f" ({attempt}/{MAX_RETRIES}): {e}"
+            )
+            await asyncio.sleep(RETRY_DELAY)
+
+
+def _merge_parts(parts: list[str], dest: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(dest, "wb") as out:
+        for part in parts:
+            with open(part, "rb") as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    sha256.update(chunk)
+                    out.write(chunk)
+    for part in parts:
+        os.remove(part)
+    return sha256.hexdigest()
+
+
+def _hash_file(path: str, sha256):
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            sha256.update(chunk)
+
+
+def _remove_stale_parts(dest: str, part_prefix: str):
+    """删除其他下载地址（如旧版本）留下的未完成文件"""
+    directory = os.path.dirname(dest) or "."
+    name = os.path.basename(dest)
+    current = os.path.basename(part_prefix)
+    for entry in os.listdir(directory):
+        if (
+            entry.startswith(f"{name}.")
+            and ".part" in entry
+            and not entry.startswith(current)
+        ):
+            try:
+                os.remove(os.path.join(directory, entry))
+            except OSError:
+                pass
+
+
+def _remove_parts(part_prefix: str, keep: list[str] = ()):
+    """删除当前下载地址留下的未完成文件，keep 中的文件除外"""
+    directory = os.path.dirname(part_prefix) or "."
+    name = os.path.basename(part_prefix)
+    keep = {os.path.basename(path) for path in keep}
+    for entry in os.listdir(directory):
+        if entry.startswith(name) and entry not in keep:
+            try:
+                os.remove(os.path.join(directory, entry))
+            except OSError:
+                pass
+
+
+def _check_size(expected: Optional[int], actual: Optional[int]):
+    if expected and actual is not None and actual != expected:
+        raise ValueError(
+            f"文件大小不符: 期望 {expected} 字节，服务器返回 {actual} 字节"
+        )
+
+
+def _content_length(resp: httpx.Response) -> Optional[int]:
+    value = resp.headers.get("content-length")
+    return int(value) if value and value.isdigit() else None
+
+
+def _content_range_total(resp: httpx.Response) -> Optional[int]:
+    # Content-Range: bytes 0-0/12345 或 bytes */12345
+    total = resp.headers.get("content-range", "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
@@ -63,6 +63,7 @@ export interface DeviceSearchData {
   controllers: DeviceControllerCapability[]
   selected_type: DeviceControllerType | null
   devices: ConnectableDevice[]
+  connected: boolean
 }
 
 interface DeviceResponse {
@@ -114,9 +115,19 @@ export function stopTask(): void {
     })
 }
 
-export function getDevices(controller?: DeviceControllerType): Promise<DeviceSearchData> {
-  const query = controller ? `?controller=${encodeURIComponent(controller)}` : ""
-  return fetch(`/api/device${query}`, { method: "GET" })
+export function getDevices(
+  controller?: DeviceControllerType,
+  refresh = false,
+): Promise<DeviceSearchData> {
+  const params = new URLSearchParams()
+  if (controller) {
+    params.set("controller", controller)
+  }
+  if (refresh) {
+    params.set("refresh", "true")
+  }
+  const query = params.toString()
+  return fetch(query ? `/api/device?${query}` : "/api/device", { method: "GET" })
     .then((res) => res.json())
     .then((data: DeviceResponse) => data.data)
 }
@@ -239,9 +250,17 @@ export interface UpdateCheckResponse {
   message?: string
 }
 
+export interface DownloadProgress {
+  downloaded: number
+  total?: number
+  rate: number // bytes per second
+  eta?: number // seconds
+}
+
 export interface UpdateStatusResponse {
   status: "idle" | "downloading" | "updating" | "success" | "failed"
   message: string
+  progress?: DownloadProgress
 }
 
 export function checkUpdateApi(): Promise<UpdateCheckResponse> {
@@ -423,3 +442,26 @@ export function getSchedulerExecutions(limit: number = 50): Promise<SchedulerApi
     res.json(),
   )
 }
+
+export function getSchedulerQueue(): Promise<SchedulerApiResponse> {
+  return fetch("/api/scheduler/queue", { method: "GET" }).then((res) => res.json())
+}
+
+export function getSchedulerDevices(): Promise<SchedulerApiResponse> {
+  return fetch("/api/scheduler/devices", { method: "GET" }).then((res) => res.json())
+}
+
+export function getSchedulerPreview(
+  hours: number = 24,
+  limit: number = 200,
+  minGap: number = 30,
+): Promise<SchedulerApiResponse> {
+  const params = new URLSearchParams({
+    hours: String(hours),
+    limit: String(limit),
+    min_gap: String(minGap),
+  })
+  return fetch(`/api/scheduler/preview?${params.toString()}`, { method: "GET" }).then((res) =>
+    res.json(),
+  )
+}
@@ -8,6 +8,7 @@ const defaultSettings: SettingsModel = {
     updateChannel: "stable",
     proxy: "",
     mirrorchyanCdk: "",
+    downloadSegments: 1,
   },
   notification: {
     systemNotification: false,
@@ -31,6 +32,7 @@ const defaultSettings: SettingsModel = {
     reminderInterval: 30,
     autoRetry: true,
     maxRetryCount: 3,
+    lazyAgent: false,
   },
   about: {
     version: "",
@@ -45,6 +47,10 @@ const defaultSettings: SettingsModel = {
     lastResource: "",
     lastConnectedDevice: null,
   },
+  scheduler: {
+    defaultGroups: [],
+    devices: [],
+  },
 }
 
 const DARK_MODE_KEY = "darkMode"
@@ -114,6 +120,7 @@ export const useSettingsStore = defineStore("settings", {
               ...data.panel,
               lastConnectedDevice: data.panel?.lastConnectedDevice ?? null,
             },
+            scheduler: { ...defaultSettings.scheduler, ...data.scheduler },
           }
           // 确保本地缓存与服务器设置同步
           localStorage.setItem(DARK_MODE_KEY, String(this.settings.ui.darkMode))
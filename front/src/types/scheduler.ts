@@ -1,6 +1,6 @@
 export type TriggerType = "cron" | "date" | "interval"
 
-export type ExecutionStatus = "running" | "success" | "failed" | "stopped"
+export type ExecutionStatus = "queued" | "running" | "success" | "failed" | "stopped" | "missed" | "coalesced"
 
 export interface CronTriggerConfig {
   type: "cron"
@@ -37,6 +37,11 @@ export interface ScheduledTask extends TaskExecutionPayload {
   enabled: boolean
   trigger_type: TriggerType
   trigger_config: TriggerConfig
+  misfire_grace_time: number
+  coalesce: boolean
+  max_instances: number
+  device?: string
+  device_group?: string
   next_run_time?: string // ISO 8601 datetime string
   created_at: string // ISO 8601 datetime string
   updated_at: string // ISO 8601 datetime string
@@ -48,6 +53,11 @@ export interface ScheduledTaskCreate extends TaskExecutionPayload {
   enabled: boolean
   trigger_type: TriggerType
   trigger_config: TriggerConfig
+  misfire_grace_time?: number
+  coalesce?: boolean
+  max_instances?: number
+  device?: string
+  device_group?: string
 }
 
 export interface ScheduledTaskUpdate {
@@ -56,10 +66,21 @@ export interface ScheduledTaskUpdate {
   enabled?: boolean
   trigger_type?: TriggerType
   trigger_config?: TriggerConfig
+  misfire_grace_time?: number
+  coalesce?: boolean
+  max_instances?: number
+  device?: string
+  device_group?: string
   task_list?: string[]
   task_options?: Record<string, string>
 }
 
+export interface TaskRunResult {
+  task?: string
+  status: "success" | "failed" | "stopped"
+  error?: string
+}
+
 export interface TaskExecution {
   id: string
   task_id: string
@@ -68,6 +89,55 @@ export interface TaskExecution {
   finished_at?: string // ISO 8601 datetime string
   status: ExecutionStatus
   error_message?: string
+  device?: string
+  task_results: TaskRunResult[]
+}
+
+export interface RunQueueStatus {
+  device: string
+  groups: string[]
+  depth: number
+  running?: TaskExecution
+  pending: TaskExecution[]
+}
+
+export interface DeviceUtilization {
+  device: string
+  groups: string[]
+  busy: boolean
+  runs: number
+  failures: number
+  busy_seconds: number
+  utilization: number
+}
+
+export interface PreviewRun {
+  task_id: string
+  task_name: string
+  fire_time: string // ISO 8601 datetime string
+  expected_start: string // ISO 8601 datetime string
+  expected_end: string // ISO 8601 datetime string
+  estimated_duration: number
+  history_samples: number
+  delay: number
+  conflict_with?: string
+}
+
+export interface IdleGap {
+  start: string // ISO 8601 datetime string
+  end: string // ISO 8601 datetime string
+  duration: number
+}
+
+export interface SchedulePreview {
+  start: string // ISO 8601 datetime string
+  end: string // ISO 8601 datetime string
+  runs: PreviewRun[]
+  total_runs: number
+  truncated: boolean
+  conflicts: number
+  idle_gaps: IdleGap[]
+  utilization: number
 }
 
 export interface SchedulerApiResponse {
@@ -76,4 +146,8 @@ export interface SchedulerApiResponse {
   tasks?: ScheduledTask[]
   task?: ScheduledTask
   executions?: TaskExecution[]
+  next_cursor?: number | null
+  queues?: RunQueueStatus[]
+  devices?: DeviceUtilization[]
+  preview?: SchedulePreview
 }
@@ -4,6 +4,7 @@ export interface UpdateSettings {
   updateChannel: "stable" | "beta"
   proxy: string
   mirrorchyanCdk: string
+  downloadSegments: number
 }
 
 // 外部通知设置
@@ -33,6 +34,7 @@ export interface RuntimeSettings {
   reminderInterval: number
   autoRetry: boolean
   maxRetryCount: number
+  lazyAgent: boolean
 }
 
 // 关于我们（包含联系方式）
@@ -65,6 +67,19 @@ export interface PanelSettings {
   lastConnectedDevice: PanelLastConnectedDevice | null
 }
 
+// 定时任务设备池中的其他设备
+export interface SchedulerDevice {
+  name: string
+  groups: string[]
+  device: PanelLastConnectedDevice
+}
+
+// 定时任务设备池设置
+export interface SchedulerSettings {
+  defaultGroups: string[]
+  devices: SchedulerDevice[]
+}
+
 // 完整设置模型
 export interface SettingsModel {
   update: UpdateSettings
@@ -73,4 +88,5 @@ export interface SettingsModel {
   runtime: RuntimeSettings
   about: AboutInfo
   panel: PanelSettings
+  scheduler: SchedulerSettings
 }
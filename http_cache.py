@@ -0,0 +1,114 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+from fastapi import Request
+from fastapi.responses import Response
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 小于该大小的内容不压缩
+MIN_COMPRESS_SIZE = 1024
+# 构建时生成的预压缩文件，按优先级排列
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+# Vite 输出的带内容哈希的文件名，如 index-BxDrn5G1.js
+HASHED_NAME = re.compile(r"-[A-Za-z0-9_-]{8}\.[a-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def accepted_encodings(headers: Headers) -> set[str]:
+    encodings = set()
+    for item in headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in {"q=0", "q=0.0"}:
+            continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+class CachedResponse:
+    """预先计算好的响应体
+
+    内容只在启动时生成一次，带强 ETag，按 Accept-Encoding 返回 br/gzip/原始版本，
+    If-None-Match 命中时返回 304。
+    """
+
+    def __init__(self, body: bytes, media_type: str, cache_control: str = "no-cache"):
+        self.body = body
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.variants: dict[str, bytes] = {}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body)
+            self.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+
+    def __call__(self, request: Request) -> Response:
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if etag_matches(request, self.etag):
+            return Response(status_code=304, headers=headers)
+        encodings = accepted_encodings(request.headers)
+        for encoding, body in self.variants.items():
+            if encoding in encodings:
+                headers["Content-Encoding"] = encoding
+                return Response(body, media_type=self.media_type, headers=headers)
+        return Response(self.body, media_type=self.media_type, headers=headers)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """静态文件服务
+
+    客户端支持时优先返回构建时生成的 .br/.gz 同名文件，
+    带内容哈希的文件名设置长期 immutable 缓存，其余文件每次协商。
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = None
+        if status_code == 200:
+            encodings = accepted_encodings(Headers(scope=scope))
+            for encoding, suffix in PRECOMPRESSED:
+                if encoding not in encodings:
+                    continue
+                compressed_path = f"{full_path}{suffix}"
+                try:
+                    compressed_stat = os.stat(compressed_path)
+                except OSError:
+                    continue
+                response = super().file_response(
+                    compressed_path, compressed_stat, scope, status_code
+                )
+                if response.status_code == 200:
+                    media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+                    if media_type.startswith("text/"):
+                        media_type += "; charset=utf-8"
+                    response.headers["Content-Type"] = media_type
+                    response.headers["Content-Encoding"] = encoding
+                break
+        if response is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers["Vary"] = "Accept-Encoding"
+        if HASHED_NAME.search(os.path.basename(full_path)):
+            response.headers["Cache-Control"] = IMMUTABLE
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
@@ -1,11 +1,13 @@
+import copy
+import math
 import os
 import subprocess
 import time
 import traceback
 from queue import SimpleQueue
 import json
-import plyer
 import threading
+from maa.define import MaaAdbInputMethodEnum, MaaAdbScreencapMethodEnum
 from maa.controller import (
     AdbController,
     Win32Controller,
@@ -15,28 +17,84 @@ from maa.controller import (
 from maa.resource import Resource
 from maa.tasker import Tasker
 from maa.toolkit import Toolkit
-import importlib.util
-import importlib.abc
+import importlib
 import re
 import sys
+from collections import OrderedDict
 from pathlib import Path
-import httpx
+from typing import Callable
 import io
-from PIL import Image
 
+from agent_loader import (
+    AgentCache,
+    AgentLoader,
+    LazyAgentTarget,
+    LazyCustomAction,
+    LazyCustomRecognition,
+    scan_agent_modules,
+)
 from models.api import DeviceModel
 from models.interface import InterfaceModel
-from models.settings import SettingsModel
+from models.settings import PanelLastConnectedDevice, SettingsModel
+from resource_cache import ResourceCache, bundle_fingerprint
+
+# 缓存的选项组合数量上限
+OVERRIDE_CACHE_SIZE = 32
+# 设备扫描结果的有效期（秒）
+DEVICE_CACHE_TTL = 10
+# 控制器类型对应的扫描方式
+SCAN_KINDS = {"Adb": "adb", "Win32": "desktop", "Gamepad": "desktop"}
+
+
+def window_matches(hwnd: int, class_name: str, window_name: str) -> bool:
+    """窗口句柄是否仍存在，且类名与标题与记录的一致"""
+    if sys.platform != "win32" or not hwnd:
+        return False
+    import ctypes
+
+    user32 = ctypes.windll.user32
+    if not user32.IsWindow(hwnd):
+        return False
+    buffer = ctypes.create_unicode_buffer(512)
+    user32.GetClassNameW(hwnd, buffer, len(buffer))
+    if buffer.value != class_name:
+        return False
+    length = user32.GetWindowTextLengthW(hwnd)
+    buffer = ctypes.create_unicode_buffer(length + 1)
+    user32.GetWindowTextW(hwnd, buffer, len(buffer))
+    return buffer.value == window_name
+
+
+def merge_pipeline_override(base: dict, override: dict) -> dict:
+    """按节点递归合并 pipeline_override，后者覆盖前者"""
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merge_pipeline_override(base[key], value)
+        else:
+            base[key] = copy.deepcopy(value)
+    return base
+
+
+_resource_cache: ResourceCache | None = None
 
-resource = Resource()
-resource.set_cpu()
+
+def _shared_resource_cache() -> ResourceCache:
+    """所有 MaaWorker 共用一份资源校验缓存，避免并发写入同一文件"""
+    global _resource_cache
+    if _resource_cache is None:
+        _resource_cache = ResourceCache()
+    return _resource_cache
 
 
 class MaaWorker:
-    def __init__(self, message_conn: SimpleQueue, interface):
-        Toolkit.init_option("./")
+    def __init__(self, message_conn: SimpleQueue, interface, name: str = ""):
         self.interface: InterfaceModel = interface
         self.message_conn = message_conn
+        # 设备池中的设备名，日志会带上该前缀；界面连接的默认设备为空
+        self.name = name
+        # 每个设备使用独立的 Resource，选项覆盖与自定义注册互不影响
+        self.resource = Resource()
+        self.resource.set_cpu()
         self.tasker = Tasker()
         self.controller = None
         self.connected = False
@@ -44,26 +102,60 @@ class MaaWorker:
         self.running = False
         self._task_lock = threading.Lock()
         self._task_thread: threading.Thread | None = None
-        self.send_log("MAA初始化成功")
+        # 上一次运行中每个任务的结果，以及任务结束时需要通知的回调
+        self.last_results: list[dict] = []
+        self._finish_callbacks: list[Callable[[list[dict]], None]] = []
+        self._override_lock = threading.Lock()
+        self._override_cache: OrderedDict[tuple, dict] = OrderedDict()
+        self._resource_lock = threading.Lock()
+        self._loaded_bundles: list[tuple[str, str]] = []
+        self._resource_cache = _shared_resource_cache()
+        # 只在同类扫描之间加锁，读取缓存与连接设备不会等待扫描
+        self._scan_locks = {"adb": threading.Lock(), "desktop": threading.Lock()}
+        self._scan_cache: dict[str, tuple[float, list]] = {}
+        # 后台定时刷新设备列表时，请求直接使用上次的扫描结果
+        self.background_refresh = False
         self.agent_process: subprocess.Popen | None = None
-        self.load_agent()
-        self.send_log("Agent加载完成")
-        self.http_client = httpx.Client(timeout=30)
+        self.lazy_targets: list[LazyAgentTarget] = []
+        self._http_client = None
+
+    def init_toolkit(self):
+        Toolkit.init_option("./")
+        self.send_log("MAA初始化成功")
 
     def send_log(self, msg):
+        if self.name:
+            msg = f"[{self.name}] {msg}"
         self.message_conn.put(
             f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())} {msg}"
         )
         time.sleep(0.05)
 
-    def send_notification(self, title, message):
+    @property
+    def http_client(self):
+        # 通知功能未使用时无需导入 httpx
+        if self._http_client is None:
+            import httpx
+
+            self._http_client = httpx.Client(timeout=30)
+        return self._http_client
+
+    def _system_notify(self, title, message):
+        import plyer
+
+        plyer.notification.notify(
+            title=title, message=message, app_name=self.interface.label, timeout=30
+        )
+
+    def _read_settings(self) -> SettingsModel:
         with open("config/settings.json", "r", encoding="utf-8") as f:
             config_data = json.load(f)
-        settings = SettingsModel(**config_data)
+        return SettingsModel(**config_data)
+
+    def send_notification(self, title, message):
+        settings = self._read_settings()
         if settings.notification.systemNotification:
-            plyer.notification.notify(
-                title=title, message=message, app_name=self.interface.label, timeout=30
-            )
+            self._system_notify(title, message)
         if settings.notification.externalNotification:
             try:
                 body = json.loads(
@@ -166,10 +258,33 @@ class MaaWorker:
         )
         return ordered
 
+    def _scan(self, kind: str, max_age: float | None = None) -> list:
+        """带缓存的设备扫描，同一次请求内多个控制器共用扫描结果
+
+        max_age 为空时，后台定时刷新运行中直接使用上次结果，否则超过 DEVICE_CACHE_TTL 后重新扫描。
+        """
+        if max_age is None:
+            max_age = math.inf if self.background_refresh else DEVICE_CACHE_TTL
+        cached = self._scan_cache.get(kind)
+        if cached and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+        with self._scan_locks[kind]:
+            # 等待期间其他线程可能已完成扫描
+            cached = self._scan_cache.get(kind)
+            if cached and time.monotonic() - cached[0] < max_age:
+                return cached[1]
+            match kind:
+                case "adb":
+                    result = Toolkit.find_adb_devices()
+                case "desktop":
+                    result = Toolkit.find_desktop_windows()
+                case _:
+                    result = []
+            self._scan_cache[kind] = (time.monotonic(), result)
+            return result
+
     def _find_devices_by_type(self, controller_type: str) -> list[dict]:
-        devices: list[dict] = []
-        win32_seen: set[int] = set()
-        gamepad_seen: set[int] = set()
+        devices: dict[tuple, dict] = {}
 
         for controller in self.interface.controller:
             if controller.type != controller_type:
@@ -181,8 +296,11 @@ class MaaWorker:
 
             match controller_type:
                 case "Adb":
-                    for device in Toolkit.find_adb_devices():
-                        data = {
+                    for device in self._scan("adb"):
+                        key = (str(device.adb_path), device.address)
+                        if key in devices:
+                            continue
+                        devices[key] = {
                             "name": device.name,
                             "type": "Adb",
                             "adb_path": device.adb_path,
@@ -190,11 +308,9 @@ class MaaWorker:
                             "screencap_methods": str(device.screencap_methods),
                             "input_methods": str(device.input_methods),
                         }
-                        if data not in devices:
-                            devices.append(data)
                 case "Win32":
                     assert controller.win32 is not None
-                    for device in Toolkit.find_desktop_windows():
+                    for device in self._scan("desktop"):
                         class_name = device.class_name
                         window_name = device.window_name
                         class_match = not controller.win32.class_regex or re.search(
@@ -207,29 +323,24 @@ class MaaWorker:
                             continue
 
                         hwnd = int(device.hwnd)
-                        if hwnd in win32_seen:
+                        if (hwnd,) in devices:
                             continue
-                        win32_seen.add(hwnd)
-
-                        devices.append(
-                            {
-                                "type": "Win32",
-                                "hWnd": hwnd,
-                                "class_name": class_name,
-                                "window_name": window_name,
-                                "screencap_methods": controller.win32.screencap or 1,
-                                "input_methods": (
-                                    controller.win32.mouse
-                                    or controller.win32.keyboard
-                                    or 1
-                                ),
-                            }
-                        )
+
+                        devices[(hwnd,)] = {
+                            "type": "Win32",
+                            "hWnd": hwnd,
+                            "class_name": class_name,
+                            "window_name": window_name,
+                            "screencap_methods": controller.win32.screencap or 1,
+                            "input_methods": (
+                                controller.win32.mouse or controller.win32.keyboard or 1
+                            ),
+                        }
                 case "PlayCover":
                     continue
                 case "Gamepad":
                     assert controller.gamepad is not None
-                    for device in Toolkit.find_desktop_windows():
+                    for device in self._scan("desktop"):
                         class_name = device.class_name
                         window_name = device.window_name
                         class_match = not controller.gamepad.class_regex or re.search(
@@ -242,23 +353,24 @@ class MaaWorker:
                             continue
 
                         hwnd = int(device.hwnd)
-                        if hwnd in gamepad_seen:
+                        if (hwnd,) in devices:
                             continue
-                        gamepad_seen.add(hwnd)
-
-                        devices.append(
-                            {
-                                "type": "Gamepad",
-                                "hWnd": hwnd,
-                                "class_name": class_name,
-                                "window_name": window_name,
-                                "screencap_methods": controller.gamepad.screencap or 1,
-                                "gamepad_type": controller.gamepad.gamepad_type or 0,
-                            }
-                        )
-        return devices
 
-    def get_device(self, controller_type: str | None = None) -> dict:
+                        devices[(hwnd,)] = {
+                            "type": "Gamepad",
+                            "hWnd": hwnd,
+                            "class_name": class_name,
+                            "window_name": window_name,
+                            "screencap_methods": controller.gamepad.screencap or 1,
+                            "gamepad_type": controller.gamepad.gamepad_type or 0,
+                        }
+        return list(devices.values())
+
+    def get_device(
+        self, controller_type: str | None = None, refresh: bool = False
+    ) -> dict:
+        if refresh:
+            self.invalidate_device_cache()
         capabilities = self._build_device_capabilities()
         all_types = [item["type"] for item in capabilities]
         enabled_types = [item["type"] for item in capabilities if item["enabled"]]
@@ -286,9 +398,27 @@ class MaaWorker:
             "controllers": capabilities,
             "selected_type": selected_type,
             "devices": devices,
+            "connected": self.connected,
         }
 
-    def connect_device(self, device_config: DeviceModel) -> bool:
+    def invalidate_device_cache(self):
+        self._scan_cache.clear()
+
+    def refresh_devices(self) -> dict[str, list[dict]]:
+        """重新扫描所有可搜索的控制器类型，供后台刷新使用
+
+        扫描期间缓存中仍保留上次结果，不会让同时到达的请求等待。
+        """
+        types = [
+            item["type"]
+            for item in self._build_device_capabilities()
+            if item["enabled"] and item["search_mode"] == "select"
+        ]
+        for kind in {SCAN_KINDS[t] for t in types if t in SCAN_KINDS}:
+            self._scan(kind, max_age=0)
+        return {t: self._find_devices_by_type(t) for t in types}
+
+    def connect_device(self, device_config: DeviceModel, notify: bool = True) -> bool:
         device_type = device_config.type
         status = False
         controller = None
@@ -322,70 +452,145 @@ class MaaWorker:
                     uuid=device_config.uuid,
                 )
                 status = controller.post_connection().wait().succeeded
-        conn_fail_msg = "设备连接失败，请检查终端日志"
-        if not status:
-            plyer.notification.notify(
-                title=self.interface.title,
-                message=conn_fail_msg,
-                app_name=self.interface.label,
-                timeout=30,
-            )
-            self.send_log(conn_fail_msg)
-            return self.connected
-        if self.tasker.bind(resource, controller):
+        if status and self.tasker.bind(self.resource, controller):
             self.connected = True
             self.controller = controller
             self.send_log("设备连接成功")
-        else:
-            plyer.notification.notify(
-                title=self.interface.title,
-                message=conn_fail_msg,
-                app_name=self.interface.label,
-                timeout=30,
-            )
+        elif notify:
+            conn_fail_msg = "设备连接失败，请检查终端日志"
+            self._system_notify(self.interface.title, conn_fail_msg)
             self.send_log(conn_fail_msg)
         return self.connected
 
+    def _stored_device_config(self, stored: PanelLastConnectedDevice) -> DeviceModel:
+        """根据上次连接的设备信息直接构造连接参数，无需扫描"""
+        match stored.type:
+            case "Adb":
+                return DeviceModel(
+                    type="Adb",
+                    adb_path=stored.adb_path,
+                    address=stored.address,
+                    screencap_methods=MaaAdbScreencapMethodEnum.Default,
+                    input_methods=MaaAdbInputMethodEnum.Default,
+                )
+            case "Win32":
+                win32 = next(
+                    (i.win32 for i in self.interface.controller if i.win32), None
+                )
+                return DeviceModel(
+                    type="Win32",
+                    hWnd=stored.hWnd,
+                    screencap_methods=(win32 and win32.screencap) or 1,
+                    input_methods=(win32 and (win32.mouse or win32.keyboard)) or 1,
+                )
+            case "Gamepad":
+                gamepad = next(
+                    (i.gamepad for i in self.interface.controller if i.gamepad), None
+                )
+                return DeviceModel(
+                    type="Gamepad",
+                    hWnd=stored.hWnd,
+                    gamepad_type=stored.gamepad_type,
+                    screencap_methods=(gamepad and gamepad.screencap) or 1,
+                )
+            case _:
+                return DeviceModel(
+                    type="PlayCover",
+                    address=stored.address or "127.0.0.1:1717",
+                    uuid=stored.uuid,
+                )
+
+    def reconnect_last_device(self, stored: PanelLastConnectedDevice) -> bool:
+        """先直接连接上次的设备，失败后再扫描匹配同一设备"""
+        if self.connected:
+            return True
+        start = time.perf_counter()
+        # 窗口句柄在重启后可能被其他窗口复用，仍是同一窗口时才直接连接
+        direct = stored.type not in ("Win32", "Gamepad") or window_matches(
+            stored.hWnd, stored.class_name, stored.window_name
+        )
+        if not (
+            direct
+            and self.connect_device(self._stored_device_config(stored), notify=False)
+        ):
+            if stored.type == "PlayCover":
+                return False
+            matched = None
+            for device in self._find_devices_by_type(stored.type):
+                if stored.type == "Adb":
+                    if device["address"] == stored.address:
+                        matched = device
+                        break
+                elif (
+                    device["class_name"] == stored.class_name
+                    and device["window_name"] == stored.window_name
+                ):
+                    matched = device
+                    break
+            if matched is None:
+                self.send_log("未找到上次连接的设备，请手动连接")
+                return False
+            if not self.connect_device(DeviceModel(**matched), notify=False):
+                self.send_log("自动重连上次设备失败，请手动连接")
+                return False
+        self.send_log(f"已自动重连上次设备，耗时 {time.perf_counter() - start:.2f}s")
+        return True
+
     def set_resource(self, resource_name):
         def replace(path: str):
             return os.path.realpath(path.replace("{PROJECT_DIR}", os.getcwd()))
 
         for i in self.interface.resource:
             if i.name == resource_name:
-                resource.post_bundle(replace(i.path[0])).wait()
-                if len(i.path) > 1:
-                    resource.post_bundle(replace(i.path[1])).wait()
-                self.send_log(f"资源已设置为: {i.name}")
+                with self._resource_lock:
+                    start = time.perf_counter()
+                    paths = [replace(path) for path in i.path]
+                    bundles = [(path, bundle_fingerprint(path)) for path in paths]
+                    if bundles == self._loaded_bundles:
+                        self.send_log(f"资源 {i.name} 已加载，无需重复加载")
+                        continue
+                    self._loaded_bundles = []
+                    try:
+                        for path, _ in bundles:
+                            if not self.resource.post_bundle(path).wait().succeeded:
+                                raise RuntimeError(f"资源加载失败: {path}")
+                    finally:
+                        # 校验只用于提示，放到后台，不增加加载耗时
+                        threading.Thread(
+                            target=self._check_pipeline, args=(paths,), daemon=True
+                        ).start()
+                    self._loaded_bundles = bundles
+                    elapsed = time.perf_counter() - start
+                self.send_log(f"资源已设置为: {i.name}，耗时 {elapsed:.2f}s")
         return None
 
-    def set_option(self, option_name: str, case: str):
-        if option_name.split("_")[0] in self.interface.option:
-            option = self.interface.option[option_name.split("_")[0]]
-            if option.type in ["select", "switch"] and option.cases:
-                for i in option.cases:
-                    if i.name == case:
-                        resource.override_pipeline(i.pipeline_override)
-                        # self.send_log(f"选项 {option_name} 设置为: {case_name}")
-                        return
-            elif option.type == "input" and option.pipeline_override:
-                temp = json.dumps(option.pipeline_override, ensure_ascii=False)
-                input_name = option_name.split("_")[1]
-                for field in option.inputs:
-                    if field.name == input_name:
-                        if field.pipeline_type == "bool":
-                            input_value = (
-                                "true"
-                                if case.lower() in ["true", "1", "yes", "y"]
-                                else "false"
-                            )
-                        elif field.pipeline_type == "int":
-                            input_value = str(int(case))
-                        else:
-                            input_value = f'"{case}"'
-                        temp = temp.replace(f'"{{{input_name}}}"', input_value)
-                        print(json.loads(temp))
-                resource.override_pipeline(json.loads(temp))
-                return
+    def _check_pipeline(self, paths: list[str]):
+        try:
+            check = self._resource_cache.check_pipeline(paths)
+            self._resource_cache.save()
+        except Exception as e:
+            self.send_log(f"资源校验失败: {e}")
+            return
+        if check.changed:
+            for error in check.errors:
+                self.send_log(f"资源校验警告: {error}")
+
+    def set_options(self, options: dict[str, str]):
+        """将所有选项合并为一份 pipeline_override 后一次性应用"""
+        key = tuple(options.items())
+        with self._override_lock:
+            override = self._override_cache.get(key)
+            if override is None:
+                override = {}
+                for fragment in self.interface.option_overrides(options):
+                    merge_pipeline_override(override, fragment)
+                self._override_cache[key] = override
+                if len(self._override_cache) > OVERRIDE_CACHE_SIZE:
+                    self._override_cache.popitem(last=False)
+            else:
+                self._override_cache.move_to_end(key)
+        if override:
+            self.resource.override_pipeline(override)
 
     def black_magic(self):
         """
@@ -407,119 +612,35 @@ class MaaWorker:
             sys.path.insert(0, str(agent_index_path))
             sys.path.insert(1, str(Path("./deps").resolve()))
 
-        # 扫描所有 .py 文件建立映射
-        module_map = {}  # module_name -> {path, is_pkg}
-        for file_path in agent_index_path.glob("**/*.py"):
-            try:
-                relative_path = file_path.relative_to(agent_index_path)
-                if file_path.name == "__init__.py":
-                    module_name = (
-                        str(relative_path.parent).replace(os.sep, ".").replace("/", ".")
-                    )
-                    if module_name in {"", "."}:
-                        continue
-                    is_pkg = True
-                else:
-                    module_name = (
-                        str(relative_path.with_suffix(""))
-                        .replace(os.sep, ".")
-                        .replace("/", ".")
-                    )
-                    is_pkg = False
-                if module_name:
-                    module_map[module_name] = {"path": str(file_path), "is_pkg": is_pkg}
-            except ValueError:
-                continue
-
-        # 自定义 Loader，利用 importlib 规范支持循环 / 相互导入
-        class AgentLoader(importlib.abc.MetaPathFinder, importlib.abc.Loader):
-            def __init__(self, mapping):
-                self.mapping = mapping
-
-            def find_spec(self, fullname, path, target=None):
-                if fullname not in self.mapping:
-                    return None
-                record = self.mapping[fullname]
-                if record["is_pkg"]:
-                    return importlib.util.spec_from_file_location(
-                        fullname,
-                        record["path"],
-                        loader=self,
-                        submodule_search_locations=[os.path.dirname(record["path"])],
-                    )
-                return importlib.util.spec_from_file_location(
-                    fullname, record["path"], loader=self
-                )
+        # 扫描所有 .py 文件建立映射，未变化的文件直接使用缓存
+        cache = AgentCache(agent_index_path)
+        module_map, to_register = scan_agent_modules(agent_index_path, cache)
 
-            def create_module(self, spec):
-                return None
-
-            def exec_module(self, module):
-                record = self.mapping[module.__name__]
-                file_path = record["path"]
-                with open(file_path, "r", encoding="utf-8") as f:
-                    source = f.read()
-
-                # 移除 @AgentServer 装饰器，避免注册时重复绑定
-                if "@AgentServer" in source:
-                    filtered_lines = [
-                        line for line in source.split("\n") if "AgentServer" not in line
-                    ]
-                    source = "\n".join(filtered_lines)
-
-                module.__file__ = file_path
-                module.__loader__ = self
-                if record["is_pkg"]:
-                    module.__package__ = module.__name__
-                    module.__path__ = [os.path.dirname(file_path)]
-                else:
-                    module.__package__ = module.__name__.rpartition(".")[0]
-
-                exec(compile(source, file_path, "exec"), module.__dict__)
-
-        loader = AgentLoader(module_map)
+        loader = AgentLoader(module_map, cache)
         sys.meta_path.insert(0, loader)
 
-        # 收集需要注册的 Action 和 Recognition
-        custom_action_pattern = re.compile(r"@AgentServer.custom_action\(\".*\"\)")
-        custom_recognition_pattern = re.compile(
-            r"@AgentServer.custom_recognition\(\".*\"\)"
-        )
-        to_register = {"action": [], "recognition": []}
-
-        for module_name, info in module_map.items():
-            file_path = info.get("path")
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-
-                for i, line in enumerate(lines):
-                    match_action = re.match(custom_action_pattern, line.strip())
-                    match_recognition = re.match(
-                        custom_recognition_pattern, line.strip()
+        if self._read_settings().runtime.lazyAgent:
+            # 按需加载：注册代理对象，首次调用时才导入模块并实例化，loader 需保留在导入链中
+            self.lazy_targets = []
+            for key in ["recognition", "action"]:
+                for item in to_register[key]:
+                    target = LazyAgentTarget(
+                        item["name"],
+                        item["module_name"],
+                        item["class_name"],
+                        on_loaded=self._on_lazy_target_loaded,
                     )
-
-                    if match_action or match_recognition:
-                        name = line.split('("')[1].split('")')[0]
-                        if i + 1 < len(lines):
-                            class_line = lines[i + 1].strip()
-                            if class_line.startswith("class "):
-                                class_name = (
-                                    class_line.split("class ")[1]
-                                    .split("(")[0]
-                                    .strip()
-                                    .split(":")[0]
-                                )
-                                key = "action" if match_action else "recognition"
-                                to_register[key].append(
-                                    {
-                                        "name": name,
-                                        "class_name": class_name,
-                                        "module_name": module_name,
-                                    }
-                                )
-            except Exception as e:
-                print(f"Error scanning {file_path}: {e}")
+                    self.lazy_targets.append(target)
+                    if key == "action":
+                        self.resource.register_custom_action(
+                            item["name"], LazyCustomAction(target)
+                        )
+                    else:
+                        self.resource.register_custom_recognition(
+                            item["name"], LazyCustomRecognition(target)
+                        )
+            cache.save(info["path"] for info in module_map.values())
+            return
 
         try:
             # 加载所有模块（支持循环/相互导入）
@@ -539,9 +660,11 @@ class MaaWorker:
                             cls = getattr(module, item["class_name"])
                             instance = cls()
                             if key == "action":
-                                resource.register_custom_action(item["name"], instance)
+                                self.resource.register_custom_action(
+                                    item["name"], instance
+                                )
                             else:
-                                resource.register_custom_recognition(
+                                self.resource.register_custom_recognition(
                                     item["name"], instance
                                 )
                     except Exception as e:
@@ -553,8 +676,18 @@ class MaaWorker:
             # 确保清理 loader，避免污染全局导入链
             if loader in sys.meta_path:
                 sys.meta_path.remove(loader)
+            cache.save(info["path"] for info in module_map.values())
 
-    def load_agent(self):
+    def _on_lazy_target_loaded(self, target: LazyAgentTarget):
+        if target.error is not None:
+            self.send_log(f"按需加载 {target.name} 失败: {target.error}")
+            return
+        self.send_log(
+            f"已按需加载 {target.name}，首次调用耗时 {target.first_call_latency:.2f}s"
+        )
+
+    def load_agent(self, spawn_process: bool = True):
+        """加载 Agent，spawn_process 为 False 时不启动独立的 Agent 进程（设备池中的其他设备）"""
         if self.interface.agent is None:
             return
         if "python" in self.interface.agent.child_exec:
@@ -567,7 +700,7 @@ class MaaWorker:
                 self.send_log("黑魔法爆炸了！")
                 self.send_log(f"自定义Agent加载失败: {e}")
                 traceback.print_exc()
-        else:
+        elif spawn_process:
             if self.interface.agent.child_args:
                 command = [
                     self.interface.agent.child_exec
@@ -590,8 +723,7 @@ class MaaWorker:
             if self.running:
                 return False
             print(task_list, options)
-            for name, case in options.items():
-                self.set_option(name, case)
+            self.set_options(options)
             self.stop_flag = False
             self.running = True
             self._task_thread = threading.Thread(
@@ -602,6 +734,14 @@ class MaaWorker:
         finally:
             self._task_lock.release()
 
+    def when_idle(self, callback: Callable[[list[dict]], None]):
+        """当前任务结束后在任务线程中调用 callback(last_results)，没有任务运行时立即调用"""
+        with self._task_lock:
+            if self.running:
+                self._finish_callbacks.append(callback)
+                return
+        callback(self.last_results)
+
     def stop_task(self) -> bool:
         if not self.running:
             return False
@@ -612,6 +752,8 @@ class MaaWorker:
 
     def _run_process(self, task_list):
         self.send_log("任务开始")
+        results = []
+        task = None
         try:
             for task in task_list:
                 if self.stop_flag:
@@ -624,27 +766,37 @@ class MaaWorker:
                     time.sleep(0.5)
                     if self.stop_flag:
                         self.tasker.post_stop().wait()
+                        results.append({"task": task, "status": "stopped"})
                         self.send_log("任务已终止")
                         return
-        except Exception:
+                results.append(
+                    {"task": task, "status": "success" if t.succeeded else "failed"}
+                )
+        except Exception as e:
+            results.append({"task": task, "status": "failed", "error": str(e)})
             traceback.print_exc()
-            plyer.notification.notify(
-                title=self.interface.title,
-                message="任务出现异常，请检查终端日志",
-                app_name=self.interface.label,
-                timeout=30,
-            )
+            self._system_notify(self.interface.title, "任务出现异常，请检查终端日志")
             self.send_log("任务出现异常，请检查终端日志")
             self.send_log(f"请将日志反馈至 {self.interface.github}/issues")
         finally:
-            self.running = False
-            self._task_thread = None
+            with self._task_lock:
+                self.last_results = results
+                self.running = False
+                self._task_thread = None
+                callbacks, self._finish_callbacks = self._finish_callbacks, []
+            for callback in callbacks:
+                try:
+                    callback(results)
+                except Exception:
+                    traceback.print_exc()
             self.send_log("所有任务完成")
             time.sleep(0.5)
 
     def get_screencap_bytes(self):
         if not self.connected or not self.controller:
             return None
+        from PIL import Image
+
         try:
             image = self.controller.post_screencap().wait().get()
             if image is not None:
@@ -1,13 +1,26 @@
+import copy
+import hashlib
+import logging
+import os
+import pickle
 import re
+import sys
+
+import pydantic
 
 from pydantic import (
     BaseModel,
     model_validator,
     ConfigDict,
     field_validator,
+    PrivateAttr,
     ValidationInfo,
 )
-from typing import List, Optional, Dict, Literal, Union, Any
+from typing import List, Optional, Dict, Literal, Union, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+INTERFACE_CACHE_PATH = "config/interface.cache"
 
 
 def validate_regex(v: Any, info: ValidationInfo) -> Any:
@@ -247,6 +260,33 @@ class InputCase(BaseModel):
     verify: Optional[str] = None
     pattern_msg: Optional[str] = None
 
+    def to_pipeline_value(self, value: str) -> Any:
+        """将前端传入的字符串转换为 pipeline 中对应类型的值"""
+        if self.pipeline_type == "bool":
+            return value.lower() in ["true", "1", "yes", "y"]
+        if self.pipeline_type == "int":
+            return int(value)
+        return value
+
+
+def find_placeholder_paths(data: Any, placeholder: str) -> List[Tuple]:
+    """查找 pipeline_override 中值恰为占位符的所有位置"""
+    paths = []
+    if isinstance(data, dict):
+        items = data.items()
+    elif isinstance(data, list):
+        items = enumerate(data)
+    else:
+        return paths
+    for key, value in items:
+        if value == placeholder:
+            paths.append((key,))
+        else:
+            paths.extend(
+                (key, *path) for path in find_placeholder_paths(value, placeholder)
+            )
+    return paths
+
 
 class Option(BaseModel):
     type: Literal["select", "input", "switch"] = "select"
@@ -295,6 +335,13 @@ class InterfaceModel(BaseModel):
     task: List[Task]
     option: Optional[Dict[str, Option]] = None
 
+    # 选项键 -> 选项名，输入类选项的键为 "{选项名}_{输入名}"
+    _option_keys: Dict[str, str] = PrivateAttr(default_factory=dict)
+    # 选项名 -> case 名 -> pipeline_override
+    _case_overrides: Dict[str, Dict[str, dict]] = PrivateAttr(default_factory=dict)
+    # 选项名 -> 输入名 -> 占位符在 pipeline_override 中的路径
+    _input_paths: Dict[str, Dict[str, List[Tuple]]] = PrivateAttr(default_factory=dict)
+
     @model_validator(mode="after")
     def set_variable_if_none(self):
         if self.label is None:
@@ -302,3 +349,122 @@ class InterfaceModel(BaseModel):
         if self.title is None and self.label and self.version:
             self.title = f"{self.label} {self.version}"
         return self
+
+    def model_post_init(self, context: Any) -> None:
+        """建立选项索引，避免每次应用选项时线性查找与文本替换"""
+        for option_name, option in (self.option or {}).items():
+            if option.type in ["select", "switch"] and option.cases:
+                self._option_keys[option_name] = option_name
+                self._case_overrides[option_name] = {
+                    case.name: case.pipeline_override
+                    for case in option.cases
+                    if case.pipeline_override
+                }
+            elif option.type == "input" and option.inputs:
+                self._input_paths[option_name] = {}
+                for field in option.inputs:
+                    self._option_keys[f"{option_name}_{field.name}"] = option_name
+                    self._input_paths[option_name][field.name] = find_placeholder_paths(
+                        option.pipeline_override or {}, f"{{{field.name}}}"
+                    )
+
+    def option_overrides(self, options: Dict[str, str]) -> List[dict]:
+        """按选项顺序生成需要应用的 pipeline_override 片段"""
+        fragments = []
+        applied_inputs = set()
+        for key, value in options.items():
+            option_name = self._option_keys.get(key)
+            if option_name is None:
+                continue
+            option = self.option[option_name]
+            if option.type != "input":
+                fragment = self._case_overrides[option_name].get(value)
+                if fragment:
+                    fragments.append(fragment)
+                continue
+            # 同一输入类选项的所有输入合并为一个片段
+            if option_name in applied_inputs or not option.pipeline_override:
+                continue
+            applied_inputs.add(option_name)
+            fragment = copy.deepcopy(option.pipeline_override)
+            for field in option.inputs:
+                input_value = options.get(f"{option_name}_{field.name}", field.default)
+                if input_value is None:
+                    continue
+                input_value = field.to_pipeline_value(input_value)
+                for path in self._input_paths[option_name][field.name]:
+                    target = fragment
+                    for step in path[:-1]:
+                        target = target[step]
+                    target[path[-1]] = input_value
+            fragments.append(fragment)
+        return fragments
+
+
+def _schema_key() -> str:
+    """模型定义变化时使缓存失效"""
+    models = [
+        AdbController,
+        Win32Controller,
+        PlayCoverController,
+        GamepadController,
+        Controller,
+        Resource,
+        Agent,
+        Task,
+        OptionCase,
+        InputCase,
+        Option,
+        InterfaceModel,
+    ]
+    schema = pydantic.VERSION + "".join(
+        f"{model.__name__}{model.model_fields}{model.__private_attributes__}"
+        for model in models
+    )
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()
+
+
+def _code_key() -> str:
+    """本模块代码变化（如程序更新后索引构建方式改变）时使缓存失效"""
+    try:
+        with open(__file__, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        # 打包后没有源文件，以可执行文件的大小与修改时间代替
+        stat = os.stat(sys.executable)
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def load_interface(
+    path: str = "interface.json", cache_path: str = INTERFACE_CACHE_PATH
+) -> InterfaceModel:
+    """加载 interface.json，文件未变化时直接使用缓存的已校验模型
+
+    缓存文件首行为缓存键，键与当前文件内容、模型定义及代码一致时才反序列化。
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    key = hashlib.sha256(
+        (hashlib.sha256(raw).hexdigest() + _schema_key() + _code_key()).encode()
+    ).hexdigest()
+    try:
+        with open(cache_path, "rb") as f:
+            if f.readline().rstrip(b"\n") == key.encode():
+                interface = pickle.load(f)
+                if isinstance(interface, InterfaceModel):
+                    return interface
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"读取 interface 缓存失败，将重新校验: {e}")
+
+    interface = InterfaceModel.model_validate_json(raw)
+    try:
+        temp_path = f"{cache_path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(key.encode() + b"\n")
+            pickle.dump(interface, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except Exception as e:
+        logger.warning(f"写入 interface 缓存失败: {e}")
+    return interface
@@ -51,6 +51,13 @@ class ScheduledTask(TaskExecutionPayload):
         ..., description="触发器类型"
     )
     trigger_config: TriggerConfig = Field(..., description="触发器配置")
+    misfire_grace_time: int = Field(
+        60, ge=0, description="错过触发时间后仍会补执行的宽限秒数，0 表示不限"
+    )
+    coalesce: bool = Field(True, description="多次错过的触发是否合并为一次执行")
+    max_instances: int = Field(1, ge=1, description="同一任务最多同时排队等待的次数")
+    device: Optional[str] = Field(None, description="目标设备，为空时不限")
+    device_group: Optional[str] = Field(None, description="目标设备组，为空时不限")
     next_run_time: Optional[datetime] = Field(None, description="下次执行时间")
     created_at: datetime = Field(default_factory=datetime.now, description="创建时间")
     updated_at: datetime = Field(default_factory=datetime.now, description="更新时间")
@@ -64,6 +71,11 @@ class ScheduledTaskCreate(TaskExecutionPayload):
     enabled: bool = True
     trigger_type: Literal["cron", "date", "interval"]
     trigger_config: TriggerConfig
+    misfire_grace_time: int = Field(60, ge=0)
+    coalesce: bool = True
+    max_instances: int = Field(1, ge=1)
+    device: Optional[str] = None
+    device_group: Optional[str] = None
 
 
 class ScheduledTaskUpdate(BaseModel):
@@ -74,10 +86,24 @@ class ScheduledTaskUpdate(BaseModel):
     enabled: Optional[bool] = None
     trigger_type: Optional[Literal["cron", "date", "interval"]] = None
     trigger_config: Optional[TriggerConfig] = None
+    misfire_grace_time: Optional[int] = Field(None, ge=0)
+    coalesce: Optional[bool] = None
+    max_instances: Optional[int] = Field(None, ge=1)
+    # 设为空字符串表示取消限制
+    device: Optional[str] = None
+    device_group: Optional[str] = None
     task_list: Optional[List[str]] = None
     task_options: Optional[Dict[str, str]] = None
 
 
+class TaskRunResult(BaseModel):
+    """单个任务的运行结果"""
+
+    task: Optional[str] = Field(None, description="任务入口")
+    status: Literal["success", "failed", "stopped"] = Field(..., description="运行结果")
+    error: Optional[str] = Field(None, description="错误信息")
+
+
 class TaskExecution(BaseModel):
     """任务执行记录"""
 
@@ -86,10 +112,14 @@ class TaskExecution(BaseModel):
     task_name: str = Field(..., description="任务名称")
     started_at: datetime = Field(..., description="开始时间")
     finished_at: Optional[datetime] = Field(None, description="结束时间")
-    status: Literal["running", "success", "failed", "stopped"] = Field(
-        ..., description="执行状态"
-    )
+    status: Literal[
+        "queued", "running", "success", "failed", "stopped", "missed", "coalesced"
+    ] = Field(..., description="执行状态")
     error_message: Optional[str] = Field(None, description="错误信息")
+    device: Optional[str] = Field(None, description="执行的设备")
+    task_results: List[TaskRunResult] = Field(
+        default_factory=list, description="各任务的运行结果"
+    )
 
 
 class TaskExecutionCreate(BaseModel):
@@ -97,5 +127,70 @@ class TaskExecutionCreate(BaseModel):
 
     task_id: str
     task_name: str
-    status: Literal["running", "success", "failed", "stopped"]
+    status: Literal[
+        "queued", "running", "success", "failed", "stopped", "missed", "coalesced"
+    ]
     error_message: Optional[str] = None
+
+
+class RunQueueStatus(BaseModel):
+    """设备运行队列状态"""
+
+    device: str = Field(..., description="设备名称")
+    groups: List[str] = Field(default_factory=list, description="所属设备组")
+    depth: int = Field(..., description="可由该设备执行的等待数量")
+    running: Optional[TaskExecution] = Field(None, description="正在执行的记录")
+    pending: List[TaskExecution] = Field(
+        default_factory=list, description="等待执行的记录"
+    )
+
+
+class DeviceUtilization(BaseModel):
+    """设备占用统计"""
+
+    device: str = Field(..., description="设备名称")
+    groups: List[str] = Field(default_factory=list, description="所属设备组")
+    busy: bool = Field(False, description="是否正在执行定时任务")
+    runs: int = Field(0, description="已开始执行的次数")
+    failures: int = Field(0, description="执行失败的次数")
+    busy_seconds: float = Field(0, description="执行定时任务的累计时长（秒）")
+    utilization: float = Field(0, description="注册以来执行定时任务的时间占比")
+
+
+class PreviewRun(BaseModel):
+    """预测的一次运行"""
+
+    task_id: str = Field(..., description="定时任务ID")
+    task_name: str = Field(..., description="任务名称")
+    fire_time: datetime = Field(..., description="触发时间")
+    expected_start: datetime = Field(..., description="预计开始时间")
+    expected_end: datetime = Field(..., description="预计结束时间")
+    estimated_duration: float = Field(..., description="预计执行时长（秒）")
+    history_samples: int = Field(0, description="用于估算时长的历史记录数量")
+    delay: float = Field(0, description="因设备占用而推迟的时长（秒）")
+    conflict_with: Optional[str] = Field(
+        None, description="触发时仍占用设备的定时任务ID"
+    )
+
+
+class IdleGap(BaseModel):
+    """设备空闲时段"""
+
+    start: datetime = Field(..., description="开始时间")
+    end: datetime = Field(..., description="结束时间")
+    duration: float = Field(..., description="时长（秒）")
+
+
+class SchedulePreview(BaseModel):
+    """调度预览结果"""
+
+    start: datetime = Field(..., description="预览开始时间")
+    end: datetime = Field(..., description="预览结束时间")
+    runs: List[PreviewRun] = Field(
+        default_factory=list, description="预测的运行，最多返回 limit 条"
+    )
+    total_runs: int = Field(0, description="窗口内预测的运行总数")
+    truncated: bool = Field(False, description="返回的运行或预览窗口是否被截断")
+    conflicts: int = Field(0, description="预测冲突次数")
+    idle_gaps: List[IdleGap] = Field(default_factory=list, description="空闲时段")
+    utilization: float = Field(0, description="设备预计占用比例")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Literal
 
 
@@ -7,6 +7,7 @@ class Update(BaseModel):
     updateChannel: Literal["stable", "beta"] = "stable"
     proxy: str = ""
     mirrorchyanCdk: str = ""
+    downloadSegments: int = Field(1, ge=1, le=8)
 
 
 class Notification(BaseModel):
@@ -35,6 +36,7 @@ class Runtime(BaseModel):
     reminderInterval: int = 30
     autoRetry: bool = True
     maxRetryCount: int = 3
+    lazyAgent: bool = False
 
 
 class About(BaseModel):
@@ -64,6 +66,20 @@ class Panel(BaseModel):
     lastConnectedDevice: Optional[PanelLastConnectedDevice] = None
 
 
+class SchedulerDevice(BaseModel):
+    """定时任务设备池中除界面连接的设备以外的设备"""
+
+    name: str
+    groups: list[str] = []
+    device: PanelLastConnectedDevice
+
+
+class Scheduler(BaseModel):
+    # 界面连接的默认设备所属的设备组
+    defaultGroups: list[str] = []
+    devices: list[SchedulerDevice] = []
+
+
 class SettingsModel(BaseModel):
     update: Update = Update()
     notification: Notification = Notification()
@@ -71,3 +87,4 @@ class SettingsModel(BaseModel):
     runtime: Runtime = Runtime()
     about: About = About()
     panel: Panel = Panel()
+    scheduler: Scheduler = Scheduler()
@@ -0,0 +1,118 @@
+"""
+启动性能分析
+
+设置环境变量 MWU_PROFILE_STARTUP=1 或使用命令行参数 --profile-startup 启用，
+启动完成后将各模块导入耗时与各启动阶段耗时写入 config/startup_profile.json。
+设置 MWU_STARTUP_BUDGET_MS 后，总耗时超出预算时会在报告中标记并输出警告。
+设置 MWU_PROFILE_EXIT=1 或使用 --profile-exit 时，写入报告后程序退出，
+超出预算时退出码为 1，供 CI 检查启动耗时是否退化。
+"""
+
+import builtins
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+REPORT_PATH = "config/startup_profile.json"
+
+EXIT_AFTER_REPORT = os.getenv("MWU_PROFILE_EXIT") == "1" or "--profile-exit" in sys.argv
+ENABLED = (
+    os.getenv("MWU_PROFILE_STARTUP") == "1"
+    or "--profile-startup" in sys.argv
+    or EXIT_AFTER_REPORT
+)
+
+
+def _read_budget() -> float:
+    value = os.getenv("MWU_STARTUP_BUDGET_MS") or "0"
+    try:
+        budget = float(value)
+        if not math.isfinite(budget) or budget < 0:
+            raise ValueError(value)
+        return budget
+    except ValueError:
+        logger.warning(f"MWU_STARTUP_BUDGET_MS 的值无效，已忽略启动预算: {value}")
+        return 0.0
+
+
+BUDGET_MS = _read_budget()
+# 程序退出时使用的退出码，超出启动预算时为 1
+exit_code = 0
+
+_start = time.perf_counter()
+_imports: list[dict] = []
+_phases: list[dict] = []
+_local = threading.local()
+_original_import = builtins.__import__
+
+
+def _profiled_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    depth = getattr(_local, "depth", 0)
+    record = {"module": name, "depth": depth, "duration_ms": 0.0}
+    _imports.append(record)
+    _local.depth = depth + 1
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _local.depth = depth
+        record["duration_ms"] = (time.perf_counter() - start) * 1000
+
+
+def install():
+    """替换内置 __import__ 以记录首次导入各模块的耗时（包含其依赖）"""
+    if ENABLED:
+        builtins.__import__ = _profiled_import
+
+
+@contextmanager
+def phase(name: str):
+    """记录模块导入期间的初始化阶段耗时"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append(
+            {"name": name, "duration": time.perf_counter() - start, "status": "done"}
+        )
+
+
+def write_report(startup_report: dict) -> bool:
+    """启动完成后写入报告，返回是否超出启动预算"""
+    global exit_code
+    if not ENABLED:
+        return False
+    builtins.__import__ = _original_import
+    total_ms = (time.perf_counter() - _start) * 1000
+    report = {
+        "total_ms": total_ms,
+        "budget_ms": BUDGET_MS or None,
+        "over_budget": bool(BUDGET_MS) and total_ms > BUDGET_MS,
+        "import_phases": _phases,
+        "startup": startup_report,
+        "imports": sorted(
+            (item for item in _imports if item["depth"] == 0),
+            key=lambda item: item["duration_ms"],
+            reverse=True,
+        ),
+        "all_imports": _imports,
+    }
+    if report["over_budget"]:
+        exit_code = 1
+        logger.warning(f"启动耗时 {total_ms:.0f}ms 超出预算 {BUDGET_MS:.0f}ms")
+    try:
+        with open(REPORT_PATH, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+        print(f"启动分析报告已写入 {REPORT_PATH}，总耗时 {total_ms:.0f}ms")
+    except Exception as e:
+        logger.warning(f"写入启动分析报告失败: {e}")
+    return report["over_budget"]
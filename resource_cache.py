@@ -0,0 +1,222 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = "config/resource_cache.json"
+CACHE_VERSION = 3
+
+# pipeline 中引用其他节点的字段
+NODE_REFERENCE_FIELDS = ("next", "interrupt", "on_error", "timeout_next")
+# MaaFramework 加载的 pipeline 文件扩展名
+PIPELINE_EXTENSIONS = (".json", ".jsonc")
+
+# 先匹配字符串，保证字符串内的 // 与逗号不被处理
+_JSON_STRING = r'("(?:\\.|[^"\\])*")'
+_JSONC_COMMENT = re.compile(_JSON_STRING + r"|//[^\n]*|/\*.*?\*/", re.S)
+_JSONC_TRAILING_COMMA = re.compile(_JSON_STRING + r"|,(\s*[}\]])")
+
+
+@dataclass
+class PipelineCheck:
+    """合并后 pipeline 的检查结果"""
+
+    fingerprint: str
+    changed: bool
+    # 本次重新计算哈希的文件数量
+    rehashed: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+def bundle_fingerprint(path: str) -> str:
+    """根据资源目录内文件的路径、大小与修改时间计算指纹"""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            stat = os.stat(os.path.join(root, name))
+            relative = os.path.relpath(os.path.join(root, name), path)
+            digest.update(f"{relative}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def _pipeline_files(bundle_path: str) -> list[str]:
+    pipeline_dir = os.path.join(bundle_path, "pipeline")
+    files = []
+    for root, dirs, names in os.walk(pipeline_dir):
+        dirs.sort()
+        files.extend(
+            os.path.join(root, name)
+            for name in sorted(names)
+            if name.endswith(PIPELINE_EXTENSIONS)
+        )
+    return files
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def loads_jsonc(text: str):
+    """解析 JSONC：与 MaaFramework 一致，允许 // 与 /* */ 注释以及末尾多余的逗号"""
+    text = _JSONC_COMMENT.sub(lambda m: m.group(1) or " ", text)
+    return json.loads(
+        _JSONC_TRAILING_COMMA.sub(lambda m: m.group(1) or m.group(2), text)
+    )
+
+
+def _references(value) -> list[str]:
+    if isinstance(value, (str, dict)):
+        value = [value]
+    if not isinstance(value, list):
+        return []
+    names = []
+    for item in value:
+        if isinstance(item, dict):
+            item = item.get("name")
+        if isinstance(item, str):
+            # 去掉 [JumpBack] 等节点属性前缀
+            names.append(item.rsplit("]", 1)[-1])
+    return names
+
+
+def validate_pipeline(bundle_files: list[tuple[str, list[str]]]) -> list[str]:
+    """按加载顺序校验合并后的 pipeline
+
+    检查 json 能否解析、同一资源包内节点名是否重复（后加载的资源包覆盖同名节点属于正常用法），
+    以及合并后各节点引用的节点是否存在。
+    """
+    errors = []
+    merged: dict[str, tuple[dict, str]] = {}
+    for bundle_path, files in bundle_files:
+        bundle_nodes: dict[str, str] = {}
+        for path in files:
+            relative = os.path.relpath(path, bundle_path)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = loads_jsonc(f.read())
+            except Exception as e:
+                errors.append(f"{relative}: {e}")
+                continue
+            if not isinstance(data, dict):
+                errors.append(f"{relative}: 顶层必须为对象")
+                continue
+            for node, body in data.items():
+                if node.startswith("$"):
+                    continue
+                if node in bundle_nodes:
+                    errors.append(
+                        f"{relative}: 节点 {node} 与 {bundle_nodes[node]} 重复"
+                    )
+                    continue
+                bundle_nodes[node] = relative
+                if not isinstance(body, dict):
+                    errors.append(f"{relative}: 节点 {node} 必须为对象")
+                    continue
+                previous = merged.get(node, ({}, relative))[0]
+                merged[node] = ({**previous, **body}, relative)
+    for node, (body, relative) in merged.items():
+        for key in NODE_REFERENCE_FIELDS:
+            for target in _references(body.get(key)):
+                if target not in merged:
+                    errors.append(
+                        f"{relative}: 节点 {node} 的 {key} 引用了不存在的节点 {target}"
+                    )
+    return errors
+
+
+class ResourceCache:
+    """pipeline 校验结果缓存
+
+    只对各资源包 pipeline 目录下的 json/jsonc 计算内容哈希，文件大小和修改时间未变化时
+    直接复用上次的哈希；合并后的 pipeline 内容不变时复用上次的校验结果。
+    资源是否需要重新加载由 bundle_fingerprint 按文件大小与修改时间判断，不读取文件内容。
+    校验在后台线程中进行，不阻塞资源加载。
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self._checks: dict[str, dict] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self._checks = data.get("checks", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"读取资源缓存失败，将重新建立: {e}")
+
+    def check_pipeline(self, bundle_paths: list[str]) -> PipelineCheck:
+        """计算按顺序加载的资源包合并后 pipeline 的指纹，内容变化时重新校验"""
+        with self._lock:
+            return self._check_pipeline(bundle_paths)
+
+    def _check_pipeline(self, bundle_paths: list[str]) -> PipelineCheck:
+        key = "\n".join(bundle_paths)
+        cached = self._checks.get(key, {})
+        cached_files: dict[str, list] = cached.get("files", {})
+        files: dict[str, list] = {}
+        bundle_files = []
+        rehashed = 0
+        digest = hashlib.sha256()
+        for bundle_path in bundle_paths:
+            paths = _pipeline_files(bundle_path)
+            bundle_files.append((bundle_path, paths))
+            for path in paths:
+                stat = os.stat(path)
+                entry = cached_files.get(path)
+                if not (
+                    entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns
+                ):
+                    entry = [stat.st_size, stat.st_mtime_ns, _hash_file(path)]
+                    rehashed += 1
+                files[path] = entry
+                relative = os.path.relpath(path, bundle_path)
+                digest.update(f"{bundle_path}|{relative}|{entry[2]}\n".encode())
+        fingerprint = digest.hexdigest()
+
+        changed = fingerprint != cached.get("fingerprint")
+        if changed:
+            errors = validate_pipeline(bundle_files)
+        else:
+            errors = cached.get("errors", [])
+        if changed or rehashed or len(files) != len(cached_files):
+            self._checks[key] = {
+                "fingerprint": fingerprint,
+                "files": files,
+                "errors": errors,
+            }
+            self._dirty = True
+        return PipelineCheck(fingerprint, changed, rehashed, errors)
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        if not self._dirty:
+            return
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": CACHE_VERSION, "checks": self._checks},
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(temp_path, self.path)
+            self._dirty = False
+        except Exception as e:
+            logger.warning(f"写入资源缓存失败: {e}")
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Set
+
+from models.scheduler import TaskExecution
+
+
+@dataclass
+class DeviceSlot:
+    """运行池中的一个设备及其占用统计"""
+
+    name: str
+    worker: object
+    groups: Set[str] = field(default_factory=set)
+    current: Optional["QueuedRun"] = None
+    runs: int = 0
+    failures: int = 0
+    busy_seconds: float = 0.0
+    busy_since: Optional[float] = None
+    registered_at: float = field(default_factory=time.monotonic)
+
+    def start(self):
+        self.runs += 1
+        self.busy_since = time.monotonic()
+
+    def finish(self, failed: bool):
+        if self.busy_since is not None:
+            self.busy_seconds += time.monotonic() - self.busy_since
+            self.busy_since = None
+        if failed:
+            self.failures += 1
+
+    def utilization(self) -> float:
+        """注册以来执行定时任务的时间占比"""
+        now = time.monotonic()
+        busy = self.busy_seconds
+        if self.busy_since is not None:
+            busy += now - self.busy_since
+        elapsed = now - self.registered_at
+        return min(busy / elapsed, 1.0) if elapsed > 0 else 0.0
+
+
+def target_matches(
+    slot: DeviceSlot, device: Optional[str], device_group: Optional[str]
+) -> bool:
+    """设备是否满足目标设备与设备组，为空的条件不限制"""
+    if device and device != slot.name:
+        return False
+    if device_group and device_group not in slot.groups:
+        return False
+    return True
+
+
+@dataclass
+class QueuedRun:
+    """等待执行的一次定时任务运行"""
+
+    execution: TaskExecution
+    task_list: List[str]
+    task_options: Dict[str, str]
+    # 超过该时间（time.monotonic）仍未开始则放弃本次运行
+    deadline: float
+    # 目标设备与设备组，为空时可由任意设备执行
+    device: Optional[str] = None
+    device_group: Optional[str] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def task_id(self) -> str:
+        return self.execution.task_id
+
+    def matches(self, slot: DeviceSlot) -> bool:
+        return target_matches(slot, self.device, self.device_group)
+
+
+class RunQueue:
+    """所有设备共享的 FIFO 运行队列
+
+    空闲的设备从队列中取出第一个可以由自己执行的运行，
+    指定了设备或设备组的运行只会被匹配的设备取走。
+    同一定时任务待执行的运行数量达到上限后，再次触发的运行会被合并。
+    """
+
+    def __init__(self):
+        self._pending: Deque[QueuedRun] = deque()
+        self._pending_tasks: Counter[str] = Counter()
+        # 每次入队后替换，唤醒所有等待中的设备
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def pending_count(self, task_id: str) -> int:
+        return self._pending_tasks[task_id]
+
+    def put(self, run: QueuedRun):
+        self._pending.append(run)
+        self._pending_tasks[run.task_id] += 1
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    async def take(self, slot: DeviceSlot) -> QueuedRun:
+        """取出第一个可由该设备执行的运行，没有时等待"""
+        while True:
+            for run in self._pending:
+                if run.matches(slot):
+                    self._remove(run)
+                    return run
+            await self._wakeup.wait()
+
+    def _remove(self, run: QueuedRun):
+        self._pending.remove(run)
+        self._pending_tasks[run.task_id] -= 1
+        if not self._pending_tasks[run.task_id]:
+            del self._pending_tasks[run.task_id]
+
+    def expire(self, now: float) -> List[QueuedRun]:
+        """移除并返回已超过等待期限的运行"""
+        expired = [run for run in self._pending if run.deadline <= now]
+        for run in expired:
+            self._remove(run)
+        return expired
+
+    def drain(self) -> List[QueuedRun]:
+        runs = list(self._pending)
+        self._pending.clear()
+        self._pending_tasks.clear()
+        return runs
+
+    @property
+    def pending(self) -> List[QueuedRun]:
+        return list(self._pending)
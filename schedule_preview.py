@@ -0,0 +1,137 @@
+import heapq
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+from models.scheduler import (
+    IdleGap,
+    PreviewRun,
+    ScheduledTask,
+    SchedulePreview,
+)
+
+# 没有历史记录时假定的单次执行时长（秒）
+DEFAULT_DURATION = 300
+# 单次预览最多模拟的运行数量，超出后预览窗口截止到此处
+MAX_SIMULATED_RUNS = 100000
+
+
+def iter_fire_times(trigger, start: datetime, end: datetime) -> Iterator[datetime]:
+    """按时间顺序逐个生成触发器在 [start, end) 内的触发时间"""
+    fire_time = trigger.get_next_fire_time(None, start)
+    while fire_time is not None and fire_time < end:
+        yield fire_time
+        fire_time = trigger.get_next_fire_time(fire_time, fire_time)
+
+
+def merge_durations(
+    tasks: List[ScheduledTask], history: Dict[str, Tuple[float, int]]
+) -> Dict[str, Tuple[float, int]]:
+    """按任务列表合并历史平均时长，任务列表相同的定时任务共享历史"""
+    totals: Dict[tuple, Tuple[float, int]] = {}
+    for task in tasks:
+        if task.id not in history:
+            continue
+        average, count = history[task.id]
+        key = tuple(task.task_list)
+        total, samples = totals.get(key, (0.0, 0))
+        totals[key] = (total + average * count, samples + count)
+    durations = {}
+    for task in tasks:
+        total, samples = totals.get(tuple(task.task_list), (0.0, 0))
+        if samples:
+            durations[task.id] = (total / samples, samples)
+    return durations
+
+
+def preview_schedule(
+    jobs: List[Tuple[ScheduledTask, object]],
+    durations: Dict[str, Tuple[float, int]],
+    start: datetime,
+    end: datetime,
+    limit: int,
+    min_gap: timedelta,
+) -> SchedulePreview:
+    """预测时间窗口内各任务的触发与执行情况
+
+    各任务的触发时间通过小根堆增量归并，只在需要时计算下一次触发时间。
+    运行按单个设备的队列顺序依次执行，用历史平均时长估算结束时间，
+    开始时设备仍被占用的运行标记为冲突，设备空闲超过 min_gap 的时段记为空闲。
+    冲突、空闲时段与占用比例按整个窗口计算，limit 只限制返回的运行数量。
+    """
+    heap = []
+    for index, (task, trigger) in enumerate(jobs):
+        fire_times = iter_fire_times(trigger, start, end)
+        first = next(fire_times, None)
+        if first is not None:
+            heap.append((first, index, fire_times))
+    heapq.heapify(heap)
+
+    runs: List[PreviewRun] = []
+    gaps: List[IdleGap] = []
+    busy_until = start
+    busy_task = None
+    busy_seconds = 0.0
+    conflicts = 0
+    total = 0
+    while heap:
+        fire_time, index, fire_times = heap[0]
+        if total >= MAX_SIMULATED_RUNS:
+            end = fire_time
+            break
+        following = next(fire_times, None)
+        if following is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, (following, index, fire_times))
+
+        task = jobs[index][0]
+        duration, samples = durations.get(task.id, (DEFAULT_DURATION, 0))
+        if fire_time - busy_until >= min_gap:
+            gaps.append(
+                IdleGap.model_construct(
+                    start=busy_until,
+                    end=fire_time,
+                    duration=(fire_time - busy_until).total_seconds(),
+                )
+            )
+        conflict_with = busy_task if fire_time < busy_until else None
+        expected_start = max(fire_time, busy_until)
+        expected_end = expected_start + timedelta(seconds=duration)
+        if conflict_with is not None:
+            conflicts += 1
+        total += 1
+        if len(runs) < limit:
+            runs.append(
+                PreviewRun.model_construct(
+                    task_id=task.id,
+                    task_name=task.name,
+                    fire_time=fire_time,
+                    expected_start=expected_start,
+                    expected_end=expected_end,
+                    estimated_duration=duration,
+                    history_samples=samples,
+                    delay=(expected_start - fire_time).total_seconds(),
+                    conflict_with=conflict_with,
+                )
+            )
+        busy_seconds += duration
+        busy_until = expected_end
+        busy_task = task.id
+
+    if end - busy_until >= min_gap:
+        gaps.append(
+            IdleGap.model_construct(
+                start=busy_until, end=end, duration=(end - busy_until).total_seconds()
+            )
+        )
+    window = (end - start).total_seconds()
+    return SchedulePreview(
+        start=start,
+        end=end,
+        runs=runs,
+        total_runs=total,
+        truncated=total > len(runs) or bool(heap),
+        conflicts=conflicts,
+        idle_gaps=gaps,
+        utilization=min(busy_seconds / window, 1.0) if window > 0 else 0.0,
+    )
@@ -1,9 +1,20 @@
 import asyncio
 import logging
+import time
 import uuid
-from datetime import datetime
-from typing import Optional, List, Dict, Literal, Any
-
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Literal, Any, Awaitable, Callable
+
+from pydantic import TypeAdapter
+
+from apscheduler.events import (
+    EVENT_JOB_MISSED,
+    EVENT_JOB_REMOVED,
+    EVENT_JOB_SUBMITTED,
+    JobEvent,
+    JobExecutionEvent,
+)
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
@@ -18,38 +29,151 @@ from models.scheduler import (
     CronTriggerConfig,
     DateTriggerConfig,
     IntervalTriggerConfig,
+    RunQueueStatus,
+    DeviceUtilization,
+    SchedulePreview,
+    TaskRunResult,
 )
+from run_queue import DeviceSlot, QueuedRun, RunQueue, target_matches
+from schedule_preview import merge_durations, preview_schedule
+from scheduler_store import STORE_PATH, SchedulerStore
 
 logger = logging.getLogger(__name__)
 
+_task_list_adapter = TypeAdapter(List[ScheduledTask])
+
+# 执行历史保留天数与保留条数，为 0 时不按该条件清理
+EXECUTION_RETENTION_DAYS = 180
+EXECUTION_RETENTION_COUNT = 50000
+# 排队等待设备空闲的最长时间（秒），超时后放弃本次运行
+QUEUE_MAX_WAIT = 3600
+DEFAULT_DEVICE = "default"
+
+
+def _set_result(future: asyncio.Future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def _summarize_results(
+    task_list: List[str], results: List[dict]
+) -> tuple[Literal["success", "failed", "stopped"], Optional[str]]:
+    """根据各任务结果得出本次执行的状态与错误信息"""
+    failed = [result for result in results if result["status"] == "failed"]
+    if failed:
+        names = ", ".join(str(result["task"]) for result in failed)
+        errors = [result["error"] for result in failed if result.get("error")]
+        return "failed", f"任务失败: {names}" + (f" ({errors[0]})" if errors else "")
+    if len(results) < len(task_list) or any(
+        result["status"] == "stopped" for result in results
+    ):
+        return "stopped", "任务已终止"
+    return "success", None
+
 
 class SchedulerManager:
     """调度器管理器"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        store_path: str = STORE_PATH,
+        retention_days: int = EXECUTION_RETENTION_DAYS,
+        retention_count: int = EXECUTION_RETENTION_COUNT,
+        queue_max_wait: float = QUEUE_MAX_WAIT,
+    ):
         self.scheduler: Optional[AsyncIOScheduler] = None
-        self._worker = None
-        self._executions: List[TaskExecution] = []
-        self._executions_lock = asyncio.Lock()
-
-    def set_worker(self, worker):
-        """设置 MaaWorker 实例"""
-        self._worker = worker
+        self._store_path = store_path
+        self._store: Optional[SchedulerStore] = None
+        # 任务原始配置，以任务 ID 为键
+        self._tasks: Dict[str, ScheduledTask] = {}
+        # 最近移除的任务，一次性任务会先被移除再报告错过触发
+        self._removed_tasks: OrderedDict[str, ScheduledTask] = OrderedDict()
+        # 序列化后的任务列表，任务或下次执行时间变化时清空
+        self._tasks_json: Optional[bytes] = None
+        self._retention_days = retention_days
+        self._retention_count = retention_count
+        # 排队中与运行中的执行记录，以执行记录 ID 为键
+        self._active_executions: Dict[str, TaskExecution] = {}
+        self._queue_max_wait = queue_max_wait
+        # 设备池，所有设备共享一个运行队列，每个设备由一个调度协程领取运行
+        self._devices: Dict[str, DeviceSlot] = {}
+        self._queue = RunQueue()
+        self._dispatchers: Dict[str, asyncio.Task] = {}
+        # 派发前需等待的条件，例如程序启动时 Agent 与设备尚未就绪
+        self._dispatch_gate: Optional[Callable[[], Awaitable[None]]] = None
+
+    def set_dispatch_gate(self, gate: Callable[[], Awaitable[None]]):
+        """设置设备开始领取运行前需等待的条件"""
+        self._dispatch_gate = gate
+
+    def set_worker(self, worker, groups: List[str] = ()):
+        """设置默认设备（界面连接的设备）的 MaaWorker 实例"""
+        self.register_worker(DEFAULT_DEVICE, worker, groups)
+
+    def register_worker(self, name: str, worker, groups: List[str] = ()):
+        """向设备池注册一个设备，同名设备已存在时替换其 MaaWorker 与设备组"""
+        slot = self._devices.get(name)
+        if slot is None:
+            slot = DeviceSlot(name=name, worker=worker, groups=set(groups))
+            self._devices[name] = slot
+        else:
+            slot.worker = worker
+            slot.groups = set(groups)
+        if self.scheduler and name not in self._dispatchers:
+            self._dispatchers[name] = asyncio.create_task(self._dispatch(slot))
 
     async def initialize(self):
         """初始化调度器"""
         # 创建调度器
         self.scheduler = AsyncIOScheduler()
+        self.scheduler.add_listener(self._on_job_removed, EVENT_JOB_REMOVED)
+        self.scheduler.add_listener(
+            self._invalidate_tasks, EVENT_JOB_SUBMITTED | EVENT_JOB_MISSED
+        )
+        self.scheduler.add_listener(self._on_job_missed, EVENT_JOB_MISSED)
+
+        # 从持久化存储恢复任务
+        self._store = SchedulerStore(self._store_path)
+        self._store.close_running_executions("程序退出时任务仍在运行")
+        self._store.prune_executions(self._retention_days, self._retention_count)
+        for task in self._store.load_tasks():
+            try:
+                # 按上次关闭时保存的下次执行时间恢复，停机期间错过的触发
+                # 交给调度器按任务的宽限时间与合并策略处理
+                self._add_job(task)
+                self._tasks[task.id] = task.model_copy(update={"next_run_time": None})
+            except Exception as e:
+                logger.warning(f"恢复定时任务 {task.name} ({task.id}) 失败: {e}")
+
+        # 为已注册的设备启动调度协程
+        for slot in self._devices.values():
+            self._dispatchers[slot.name] = asyncio.create_task(self._dispatch(slot))
 
         # 启动调度器
         self.scheduler.start()
-        logger.info("调度器已启动")
+        logger.info(f"调度器已启动，已恢复 {len(self._tasks)} 个定时任务")
 
     async def shutdown(self):
         """关闭调度器"""
         if self.scheduler:
+            # 保存下次执行时间，重启后据此补执行停机期间错过的触发
+            if self._store:
+                for task in self._tasks.values():
+                    self._store.save_task(self._with_next_run_time(task))
             self.scheduler.shutdown()
             logger.info("调度器已关闭")
+        for dispatcher in self._dispatchers.values():
+            dispatcher.cancel()
+        self._dispatchers.clear()
+        runs = self._queue.drain()
+        runs.extend(slot.current for slot in self._devices.values() if slot.current)
+        for run in runs:
+            await self._update_execution_status(
+                run.execution.id, "stopped", "调度器已关闭"
+            )
+        if self._store:
+            self._store.close()
+            self._store = None
 
     def _create_trigger(self, trigger_config: TriggerConfig):
         """根据配置创建触发器"""
@@ -81,166 +205,289 @@ class SchedulerManager:
         else:
             raise ValueError(f"未知的触发器类型: {type(trigger_config)}")
 
+    def _add_job(self, task: ScheduledTask):
+        """将任务添加到调度器，未启用的任务以暂停状态添加"""
+        job_kwargs = {}
+        if not task.enabled:
+            job_kwargs["next_run_time"] = None
+        elif task.next_run_time is not None:
+            job_kwargs["next_run_time"] = task.next_run_time
+        self.scheduler.add_job(
+            self._execute_task,
+            self._create_trigger(task.trigger_config),
+            id=task.id,
+            kwargs=self._job_kwargs(task),
+            replace_existing=True,
+            **self._job_policy(task),
+            **job_kwargs,
+        )
+
+    def _job_policy(self, task: ScheduledTask) -> dict:
+        return {
+            "misfire_grace_time": task.misfire_grace_time or None,
+            "coalesce": task.coalesce,
+            "max_instances": task.max_instances,
+        }
+
+    def _job_kwargs(self, task: ScheduledTask) -> dict:
+        # 一次性任务触发后会先从调度器移除再执行，因此执行所需信息随任务保存
+        return {
+            "task_id": task.id,
+            "task_name": task.name,
+            "task_list": task.task_list,
+            "task_options": task.task_options,
+            "max_instances": task.max_instances,
+            "device": task.device,
+            "device_group": task.device_group,
+        }
+
+    def _check_target(self, device: Optional[str], device_group: Optional[str]):
+        """目标设备或设备组没有匹配的已注册设备时拒绝保存，避免每次触发都失败"""
+        if not device and not device_group:
+            return
+        if any(
+            target_matches(slot, device, device_group)
+            for slot in self._devices.values()
+        ):
+            return
+        raise ValueError(
+            f"没有匹配的设备: 设备 {device or '不限'}，设备组 {device_group or '不限'}"
+            f"（已注册的设备: {', '.join(self._devices) or '无'}）"
+        )
+
+    def _invalidate_tasks(self, event: Optional[JobEvent] = None):
+        self._tasks_json = None
+
+    def _on_job_missed(self, event: JobExecutionEvent):
+        """记录错过宽限时间而未执行的触发"""
+        task = self._tasks.get(event.job_id) or self._removed_tasks.get(event.job_id)
+        if task is None or not self._store:
+            return
+        scheduled = event.scheduled_run_time.astimezone().replace(tzinfo=None)
+        logger.warning(f"定时任务 {task.name} 错过了 {scheduled} 的触发")
+        self._store.add_execution(
+            TaskExecution(
+                id=str(uuid.uuid4()),
+                task_id=task.id,
+                task_name=task.name,
+                started_at=scheduled,
+                finished_at=None,
+                status="missed",
+                error_message=f"超过 {task.misfire_grace_time} 秒宽限时间未执行",
+            )
+        )
+
+    def _save_task(self, task: ScheduledTask):
+        self._tasks[task.id] = task
+        self._invalidate_tasks()
+        if self._store:
+            self._store.save_task(task)
+
+    def _on_job_removed(self, event: JobEvent):
+        """任务从调度器移除时（包括一次性任务执行完毕）同步删除存储记录"""
+        task = self._tasks.pop(event.job_id, None)
+        if task is not None:
+            self._removed_tasks[task.id] = task
+            if len(self._removed_tasks) > 100:
+                self._removed_tasks.popitem(last=False)
+        self._invalidate_tasks()
+        if self._store:
+            self._store.delete_task(event.job_id)
+
+    def _with_next_run_time(self, task: ScheduledTask) -> ScheduledTask:
+        job = self.scheduler.get_job(task.id) if self.scheduler else None
+        return task.model_copy(
+            update={"next_run_time": job.next_run_time if job else None}
+        )
+
     async def _execute_task(
         self,
         task_id: str,
         task_name: str,
         task_list: List[str],
         task_options: Dict[str, str],
+        max_instances: int = 1,
+        device: Optional[str] = None,
+        device_group: Optional[str] = None,
     ):
-        """执行定时任务"""
-        logger.info(f"开始执行定时任务: {task_id}")
+        """定时任务触发时加入运行队列，由匹配的空闲设备按顺序执行"""
+        # 先移除超时的运行，避免本次触发被合并到即将放弃的运行中
+        await self._expire_queued_runs()
+        if self._queue.pending_count(task_id) >= max_instances:
+            logger.info(f"定时任务 {task_id} 已在队列中等待，合并本次触发")
+            now = datetime.now()
+            await self._add_execution(
+                TaskExecution(
+                    id=str(uuid.uuid4()),
+                    task_id=task_id,
+                    task_name=task_name,
+                    started_at=now,
+                    finished_at=now,
+                    status="coalesced",
+                    error_message="已与队列中等待的运行合并",
+                ),
+                active=False,
+            )
+            return
 
         # 创建执行记录
-        execution_id = str(uuid.uuid4())
         execution = TaskExecution(
-            id=execution_id,
+            id=str(uuid.uuid4()),
             task_id=task_id,
             task_name=task_name,
             started_at=datetime.now(),
-            status="running",
+            status="queued",
             finished_at=None,
             error_message=None,
         )
         await self._add_execution(execution)
-
+        run = QueuedRun(
+            execution=execution,
+            task_list=task_list,
+            task_options=task_options,
+            deadline=time.monotonic() + self._queue_max_wait,
+            device=device,
+            device_group=device_group,
+        )
+        if not any(run.matches(slot) for slot in self._devices.values()):
+            logger.error(f"没有匹配的设备，无法执行定时任务 {task_id}")
+            await self._update_execution_status(
+                execution.id, "failed", "没有匹配的设备"
+            )
+            return
+        self._queue.put(run)
+        logger.info(f"定时任务 {task_id} 已加入运行队列，队列长度 {len(self._queue)}")
+
+    async def _dispatch(self, slot: DeviceSlot):
+        """设备空闲时从运行队列领取可执行的任务"""
+        if self._dispatch_gate is not None:
+            await self._dispatch_gate()
+        while True:
+            # 设备被手动启动的任务占用时不领取，让其他空闲设备先执行
+            await self._wait_idle(slot.worker)
+            run = await self._queue.take(slot)
+            slot.current = run
+            try:
+                await self._run(slot, run)
+            finally:
+                slot.current = None
+
+    async def _wait_idle(self, worker, timeout: Optional[float] = None) -> List[dict]:
+        """等待设备上的任务结束，由任务线程通过事件循环回调唤醒，返回各任务结果"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def on_finished(results: List[dict]):
+            loop.call_soon_threadsafe(_set_result, future, results)
+
+        worker.when_idle(on_finished)
+        return await asyncio.wait_for(future, timeout)
+
+    async def _run(self, slot: DeviceSlot, run: QueuedRun):
+        """等待设备空闲后执行一次排队的定时任务"""
+        task_id = run.task_id
+        execution_id = run.execution.id
+        worker = slot.worker
         try:
-            # 检查是否有任务正在运行
-            if self._worker and self._worker.running:
-                logger.warning(f"任务已在运行，跳过定时任务 {task_id}")
-                await self._update_execution_status(
-                    execution_id, "stopped", "任务已在运行"
-                )
-                return
-
-            # 检查设备是否已连接
-            if not self._worker or not self._worker.connected:
-                logger.error(f"设备未连接，无法执行定时任务 {task_id}")
-                await self._update_execution_status(
-                    execution_id, "failed", "设备未连接"
-                )
-                return
+            while True:
+                # 等待设备空闲，例如手动启动的任务仍在运行
+                try:
+                    await self._wait_idle(
+                        worker, max(0.0, run.deadline - time.monotonic())
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(f"定时任务 {task_id} 排队超时，已放弃")
+                    await self._update_execution_status(
+                        execution_id, "stopped", "排队超时"
+                    )
+                    return
+
+                # 检查设备是否已连接
+                if not worker.connected:
+                    logger.error(f"设备 {slot.name} 未连接，无法执行定时任务 {task_id}")
+                    await self._update_execution_status(
+                        execution_id, "failed", "设备未连接"
+                    )
+                    return
+
+                # 启动任务，被其他任务抢先启动时继续等待
+                if worker.start_task(run.task_list, run.task_options):
+                    break
 
-            # 启动任务
-            if not self._worker.start_task(task_list, task_options):
-                logger.warning(f"任务已在运行，跳过定时任务 {task_id}")
-                await self._update_execution_status(
-                    execution_id, "stopped", "任务已在运行"
-                )
-                return
+            logger.info(f"设备 {slot.name} 开始执行定时任务: {task_id}")
+            slot.start()
+            await self._start_execution(execution_id, slot.name)
 
             # 等待任务完成
-            while self._worker and self._worker.running:
-                await asyncio.sleep(1)
-
-            await self._update_execution_status(execution_id, "success")
-            logger.info(f"定时任务 {task_id} 执行成功")
+            status = "failed"
+            try:
+                results = await self._wait_idle(worker)
+                status, error_message = _summarize_results(run.task_list, results)
+            finally:
+                slot.finish(status == "failed")
+            await self._update_execution_status(
+                execution_id, status, error_message, results
+            )
+            logger.info(f"定时任务 {task_id} 执行结束: {status}")
 
         except Exception as e:
             logger.error(f"定时任务 {task_id} 执行失败: {e}")
             await self._update_execution_status(execution_id, "failed", str(e))
 
-    def _build_trigger_config(
-        self, trigger
-    ) -> tuple[Literal["cron", "date", "interval"], TriggerConfig]:
-        """从 APScheduler trigger 重建触发器类型与配置"""
-        if isinstance(trigger, CronTrigger):
-            field_map = {field.name: str(field) for field in trigger.fields}
-            cron = " ".join(
-                [
-                    field_map.get("minute", "*"),
-                    field_map.get("hour", "*"),
-                    field_map.get("day", "*"),
-                    field_map.get("month", "*"),
-                    field_map.get("day_of_week", "*"),
-                ]
-            )
-            return "cron", CronTriggerConfig(cron=cron)
-
-        if isinstance(trigger, DateTrigger):
-            run_date = getattr(trigger, "run_date", None)
-            if run_date is None:
-                raise ValueError("DateTrigger 缺少 run_date")
-            return "date", DateTriggerConfig(run_date=run_date)
-
-        if isinstance(trigger, IntervalTrigger):
-            interval = getattr(trigger, "interval", None)
-            total_seconds = int(interval.total_seconds()) if interval is not None else 0
-
-            week_seconds = 7 * 24 * 60 * 60
-            day_seconds = 24 * 60 * 60
-
-            weeks, remainder = divmod(total_seconds, week_seconds)
-            days, remainder = divmod(remainder, day_seconds)
-            hours, remainder = divmod(remainder, 60 * 60)
-            minutes, seconds = divmod(remainder, 60)
-
-            return "interval", IntervalTriggerConfig(
-                weeks=weeks or None,
-                days=days or None,
-                hours=hours or None,
-                minutes=minutes or None,
-                seconds=seconds or None,
-                start_date=getattr(trigger, "start_date", None),
-                end_date=getattr(trigger, "end_date", None),
-            )
-
-        raise ValueError(f"未知的触发器类型: {type(trigger)}")
-
-    async def _add_execution(self, execution: TaskExecution):
-        """添加执行记录"""
-        async with self._executions_lock:
-            self._executions.append(execution)
-            # 只保留最近 100 条记录
-            if len(self._executions) > 100:
-                self._executions = self._executions[-100:]
+    async def _expire_queued_runs(self):
+        """放弃排队超过等待期限的运行"""
+        for run in self._queue.expire(time.monotonic()):
+            logger.warning(f"定时任务 {run.task_id} 排队超时，已放弃")
+            await self._update_execution_status(run.execution.id, "stopped", "排队超时")
+
+    async def _add_execution(self, execution: TaskExecution, active: bool = True):
+        """添加执行记录，并按保留策略清理旧记录"""
+        if active:
+            self._active_executions[execution.id] = execution
+        if self._store:
+            self._store.add_execution(execution)
+            self._store.prune_executions(self._retention_days, self._retention_count)
+
+    async def _start_execution(self, execution_id: str, device: str):
+        """排队的执行记录开始运行，开始时间改为实际开始的时间"""
+        execution = self._active_executions.get(execution_id)
+        if execution is None:
+            return
+        execution.status = "running"
+        execution.device = device
+        execution.started_at = datetime.now()
+        if self._store:
+            self._store.update_execution(execution)
 
     async def _update_execution_status(
         self,
         execution_id: str,
-        status: Literal["running", "success", "failed", "stopped"],
+        status: Literal["queued", "running", "success", "failed", "stopped"],
         error_message: Optional[str] = None,
+        task_results: Optional[List[dict]] = None,
     ):
         """更新执行记录状态"""
-        async with self._executions_lock:
-            for execution in self._executions:
-                if execution.id == execution_id:
-                    execution.status = status
-                    execution.finished_at = datetime.now()
-                    if error_message:
-                        execution.error_message = error_message
-                    break
+        execution = self._active_executions.pop(execution_id, None)
+        if execution is None:
+            return
+        execution.status = status
+        execution.finished_at = datetime.now()
+        if error_message:
+            execution.error_message = error_message
+        if task_results:
+            execution.task_results = [
+                TaskRunResult.model_validate(result) for result in task_results
+            ]
+        if self._store:
+            self._store.update_execution(execution)
 
     async def create_task(self, task_create: ScheduledTaskCreate) -> ScheduledTask:
         """创建定时任务"""
         if not self.scheduler:
             raise RuntimeError("调度器未初始化")
 
+        self._check_target(task_create.device, task_create.device_group)
         task_id = str(uuid.uuid4())
-        trigger = self._create_trigger(task_create.trigger_config)
-
-        # 添加任务到调度器，存储完整的任务信息
-        self.scheduler.add_job(
-            self._execute_task,
-            trigger,
-            id=task_id,
-            kwargs={
-                "task_id": task_id,
-                "task_name": task_create.name,
-                "task_list": task_create.task_list,
-                "task_options": task_create.task_options,
-            },
-        )
-
-        # 如果任务未启用，则暂停
-        if not task_create.enabled:
-            self.scheduler.pause_job(task_id)
-
-        # 获取下次执行时间
-        job = self.scheduler.get_job(task_id)
-        next_run_time = job.next_run_time if job else None
-
-        # 创建任务对象
         task = ScheduledTask(
             id=task_id,
             name=task_create.name,
@@ -250,8 +497,15 @@ class SchedulerManager:
             trigger_config=task_create.trigger_config,
             task_list=task_create.task_list,
             task_options=task_create.task_options,
-            next_run_time=next_run_time,
+            misfire_grace_time=task_create.misfire_grace_time,
+            coalesce=task_create.coalesce,
+            max_instances=task_create.max_instances,
+            device=task_create.device,
+            device_group=task_create.device_group,
         )
+        self._add_job(task)
+        self._save_task(task)
+        task = self._with_next_run_time(task)
 
         logger.info(f"创建定时任务: {task.name} ({task_id})")
         return task
@@ -260,71 +514,22 @@ class SchedulerManager:
         """获取定时任务"""
         if not self.scheduler:
             return None
-        job = self.scheduler.get_job(task_id)
-        if not job:
+        task = self._tasks.get(task_id)
+        if task is None:
             return None
-
-        # 从 kwargs 中获取任务信息
-        task_name = job.kwargs.get("task_name", "")
-        task_list = job.kwargs.get("task_list", [])
-        task_options = job.kwargs.get("task_options", {})
-        trigger_type: Literal["cron", "date", "interval"]
-
-        try:
-            trigger_type, trigger_config = self._build_trigger_config(job.trigger)
-        except Exception as e:
-            logger.warning(f"重建触发器配置失败，使用默认 cron 配置: {e}")
-            trigger_type = "cron"
-            trigger_config = CronTriggerConfig(cron="* * * * *")
-
-        return ScheduledTask(
-            id=task_id,
-            name=task_name,
-            description="",
-            enabled=job.next_run_time is not None,
-            trigger_type=trigger_type,
-            trigger_config=trigger_config,
-            task_list=task_list,
-            task_options=task_options,
-            next_run_time=job.next_run_time,
-        )
+        return self._with_next_run_time(task)
 
     async def get_all_tasks(self) -> List[ScheduledTask]:
         """获取所有定时任务"""
         if not self.scheduler:
             return []
-        tasks = []
-        jobs = self.scheduler.get_jobs()
-
-        for job in jobs:
-            task_name = job.kwargs.get("task_name", "")
-            task_list = job.kwargs.get("task_list", [])
-            task_options = job.kwargs.get("task_options", {})
-            trigger_type: Literal["cron", "date", "interval"]
+        return [self._with_next_run_time(task) for task in self._tasks.values()]
 
-            try:
-                trigger_type, trigger_config = self._build_trigger_config(job.trigger)
-            except Exception as e:
-                logger.warning(
-                    f"重建任务 {job.id} 的触发器配置失败，使用默认 cron 配置: {e}"
-                )
-                trigger_type = "cron"
-                trigger_config = CronTriggerConfig(cron="* * * * *")
-
-            task = ScheduledTask(
-                id=job.id,
-                name=task_name,
-                description="",
-                enabled=job.next_run_time is not None,
-                trigger_type=trigger_type,
-                trigger_config=trigger_config,
-                task_list=task_list,
-                task_options=task_options,
-                next_run_time=job.next_run_time,
-            )
-            tasks.append(task)
-
-        return tasks
+    async def get_all_tasks_json(self) -> bytes:
+        """获取序列化后的任务列表，未变化时直接返回缓存"""
+        if self._tasks_json is None:
+            self._tasks_json = _task_list_adapter.dump_json(await self.get_all_tasks())
+        return self._tasks_json
 
     async def update_task(
         self, task_id: str, task_update: ScheduledTaskUpdate
@@ -333,68 +538,51 @@ class SchedulerManager:
         if not self.scheduler:
             logger.error("调度器未初始化")
             return None
-        job = self.scheduler.get_job(task_id)
-        if not job:
+        current = self._tasks.get(task_id)
+        if current is None or not self.scheduler.get_job(task_id):
             logger.error(f"任务不存在: {task_id}")
             return None
+        self._check_target(
+            current.device if task_update.device is None else task_update.device,
+            (
+                current.device_group
+                if task_update.device_group is None
+                else task_update.device_group
+            ),
+        )
 
         try:
-            # 获取当前任务信息
-            current_kwargs = job.kwargs
+            # 合并更新数据
+            changes = task_update.model_dump(exclude_unset=True, exclude_none=True)
+            changes.pop("trigger_config", None)
+            changes.pop("trigger_type", None)
+            if task_update.trigger_config is not None:
+                changes["trigger_config"] = task_update.trigger_config
+                changes["trigger_type"] = task_update.trigger_config.type
+            changes["updated_at"] = datetime.now()
+            task = current.model_copy(update=changes)
+            trigger = self._create_trigger(task.trigger_config)
+            previous_run_time = self.scheduler.get_job(task_id).next_run_time
 
             try:
-                current_trigger_type, current_trigger_config = (
-                    self._build_trigger_config(job.trigger)
+                # 替换触发器并重新计算下次执行时间
+                self.scheduler.modify_job(
+                    task_id, kwargs=self._job_kwargs(task), **self._job_policy(task)
                 )
-            except Exception as e:
-                logger.warning(f"重建当前触发器配置失败，使用默认 cron 配置: {e}")
-                current_trigger_type = "cron"
-                current_trigger_config = CronTriggerConfig(cron="* * * * *")
-
-            # 合并更新数据
-            new_name = (
-                task_update.name
-                if task_update.name is not None
-                else current_kwargs.get("task_name", "")
-            )
-            new_task_list = (
-                task_update.task_list
-                if task_update.task_list is not None
-                else current_kwargs.get("task_list", [])
-            )
-            new_options = (
-                task_update.task_options
-                if task_update.task_options is not None
-                else current_kwargs.get("task_options", {})
-            )
+                self.scheduler.reschedule_job(task_id, trigger=trigger)
 
-            new_trigger_config = (
-                task_update.trigger_config
-                if task_update.trigger_config is not None
-                else current_trigger_config
-            )
-
-            # 创建新的触发器
-            trigger = self._create_trigger(new_trigger_config)
-
-            # 修改任务
-            self.scheduler.modify_job(
-                task_id,
-                trigger=trigger,
-                kwargs={
-                    "task_id": task_id,
-                    "task_name": new_name,
-                    "task_list": new_task_list,
-                    "task_options": new_options,
-                },
-            )
-
-            # 处理启用/暂停状态
-            if task_update.enabled is not None:
-                if task_update.enabled:
+                # 处理启用/暂停状态
+                if task.enabled:
                     self.scheduler.resume_job(task_id)
                 else:
                     self.scheduler.pause_job(task_id)
+            except Exception:
+                # 调度器更新失败时恢复原有的任务，保证与已保存的配置一致
+                self._add_job(
+                    current.model_copy(update={"next_run_time": previous_run_time})
+                )
+                raise
+            self._save_task(task)
 
             # 获取更新后的任务
             return await self.get_task(task_id)
@@ -414,12 +602,22 @@ class SchedulerManager:
             logger.error(f"删除任务失败: {e}")
             return False
 
+    def _set_enabled(self, task_id: str, enabled: bool):
+        task = self._tasks.get(task_id)
+        if task is not None and task.enabled != enabled:
+            self._save_task(
+                task.model_copy(
+                    update={"enabled": enabled, "updated_at": datetime.now()}
+                )
+            )
+
     async def pause_task(self, task_id: str) -> bool:
         """暂停定时任务"""
         if not self.scheduler:
             return False
         try:
             self.scheduler.pause_job(task_id)
+            self._set_enabled(task_id, False)
             logger.info(f"暂停定时任务: {task_id}")
             return True
         except Exception as e:
@@ -432,13 +630,85 @@ class SchedulerManager:
             return False
         try:
             self.scheduler.resume_job(task_id)
+            self._set_enabled(task_id, True)
             logger.info(f"恢复定时任务: {task_id}")
             return True
         except Exception as e:
             logger.error(f"恢复任务失败: {e}")
             return False
 
-    async def get_executions(self, limit: int = 50) -> List[TaskExecution]:
-        """获取执行历史"""
-        async with self._executions_lock:
-            return self._executions[-limit:]
+    async def get_executions(
+        self,
+        limit: int = 50,
+        task_id: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[int] = None,
+    ) -> tuple[List[TaskExecution], Optional[int]]:
+        """获取执行历史，返回记录列表与下一页游标"""
+        if not self._store:
+            return [], None
+        return self._store.query_executions(
+            limit, task_id, status, since, until, cursor
+        )
+
+    async def get_queue_status(self) -> List[RunQueueStatus]:
+        """获取各设备运行队列状态"""
+        await self._expire_queued_runs()
+        pending = self._queue.pending
+        statuses = []
+        for slot in self._devices.values():
+            runs = [run.execution for run in pending if run.matches(slot)]
+            statuses.append(
+                RunQueueStatus(
+                    device=slot.name,
+                    groups=sorted(slot.groups),
+                    depth=len(runs),
+                    running=slot.current.execution if slot.current else None,
+                    pending=runs,
+                )
+            )
+        return statuses
+
+    async def get_device_stats(self) -> List[DeviceUtilization]:
+        """获取各设备的占用统计"""
+        return [
+            DeviceUtilization(
+                device=slot.name,
+                groups=sorted(slot.groups),
+                busy=slot.current is not None,
+                runs=slot.runs,
+                failures=slot.failures,
+                busy_seconds=slot.busy_seconds,
+                utilization=slot.utilization(),
+            )
+            for slot in self._devices.values()
+        ]
+
+    async def preview(
+        self, hours: float = 24, limit: int = 200, min_gap_minutes: float = 30
+    ) -> SchedulePreview:
+        """预测未来一段时间内各任务的触发时间、冲突与设备空闲时段"""
+        if not self.scheduler:
+            raise RuntimeError("调度器未初始化")
+        start = datetime.now(self.scheduler.timezone)
+        jobs = []
+        for task in self._tasks.values():
+            job = self.scheduler.get_job(task.id)
+            # 已暂停的任务不会触发
+            if job is None or job.next_run_time is None:
+                continue
+            jobs.append((task, job.trigger))
+        history = self._store.average_durations() if self._store else {}
+        durations = merge_durations([task for task, _ in jobs], history)
+        # 计算量随时间窗口增长，放到线程中执行以免阻塞事件循环
+        return await asyncio.to_thread(
+            preview_schedule,
+            jobs,
+            durations,
+            start,
+            start + timedelta(hours=hours),
+            limit,
+            timedelta(minutes=min_gap_minutes),
+        )
@@ -0,0 +1,226 @@
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from models.scheduler import ScheduledTask, TaskExecution
+
+logger = logging.getLogger(__name__)
+
+STORE_PATH = "config/scheduler.db"
+
+
+class SchedulerStore:
+    """定时任务持久化存储
+
+    使用 SQLite 保存定时任务的原始配置（包括触发器配置、描述与创建/更新时间），
+    调度器重启后据此重新添加任务。下次执行时间只在调度器关闭时保存。
+    执行历史按任务、状态与开始时间建立索引，自增序号作为分页游标。
+    """
+
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks (id TEXT PRIMARY KEY, data TEXT NOT NULL)"
+        )
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS executions (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL UNIQUE,
+                task_id TEXT NOT NULL,
+                task_name TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                finished_at REAL,
+                status TEXT NOT NULL,
+                error_message TEXT,
+                task_results TEXT,
+                device TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_executions_task
+                ON executions (task_id, seq);
+            CREATE INDEX IF NOT EXISTS idx_executions_status
+                ON executions (status, seq);
+            CREATE INDEX IF NOT EXISTS idx_executions_started
+                ON executions (started_at);
+            """
+        )
+        columns = {
+            row[1] for row in self._conn.execute("PRAGMA table_info(executions)")
+        }
+        for column in ("task_results", "device"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE executions ADD COLUMN {column} TEXT")
+        self._conn.commit()
+
+    def load_tasks(self) -> List[ScheduledTask]:
+        tasks = []
+        for task_id, data in self._conn.execute(
+            "SELECT id, data FROM tasks ORDER BY rowid"
+        ):
+            try:
+                tasks.append(ScheduledTask.model_validate_json(data))
+            except Exception as e:
+                logger.warning(f"读取定时任务 {task_id} 失败，已忽略: {e}")
+        return tasks
+
+    def save_task(self, task: ScheduledTask):
+        data = task.model_dump_json()
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO tasks (id, data) VALUES (?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+                (task.id, data),
+            )
+
+    def delete_task(self, task_id: str):
+        with self._conn:
+            self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def add_execution(self, execution: TaskExecution):
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO executions (id, task_id, task_name, started_at,"
+                " finished_at, status, error_message, task_results, device)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    execution.id,
+                    execution.task_id,
+                    execution.task_name,
+                    execution.started_at.timestamp(),
+                    _timestamp(execution.finished_at),
+                    execution.status,
+                    execution.error_message,
+                    _dump_results(execution),
+                    execution.device,
+                ),
+            )
+
+    def update_execution(self, execution: TaskExecution):
+        with self._conn:
+            self._conn.execute(
+                "UPDATE executions SET started_at = ?, finished_at = ?, status = ?,"
+                " error_message = ?, task_results = ?, device = ? WHERE id = ?",
+                (
+                    execution.started_at.timestamp(),
+                    _timestamp(execution.finished_at),
+                    execution.status,
+                    execution.error_message,
+                    _dump_results(execution),
+                    execution.device,
+                    execution.id,
+                ),
+            )
+
+    def close_running_executions(self, error_message: str) -> int:
+        """将上次退出时仍在排队或运行中的记录标记为已停止"""
+        with self._conn:
+            cursor = self._conn.execute(
+                "UPDATE executions SET status = 'stopped', finished_at = ?,"
+                " error_message = ? WHERE status IN ('queued', 'running')",
+                (datetime.now().timestamp(), error_message),
+            )
+        return cursor.rowcount
+
+    def query_executions(
+        self,
+        limit: int = 50,
+        task_id: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[int] = None,
+    ) -> tuple[List[TaskExecution], Optional[int]]:
+        """按条件查询执行历史
+
+        从新到旧取 limit 条，按时间正序返回；还有更早的记录时返回下一页游标。
+        """
+        conditions = []
+        params: list = []
+        if task_id is not None:
+            conditions.append("task_id = ?")
+            params.append(task_id)
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        if since is not None:
+            conditions.append("started_at >= ?")
+            params.append(since.timestamp())
+        if until is not None:
+            conditions.append("started_at < ?")
+            params.append(until.timestamp())
+        if cursor is not None:
+            conditions.append("seq < ?")
+            params.append(cursor)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._conn.execute(
+            "SELECT seq, id, task_id, task_name, started_at, finished_at, status,"
+            f" error_message, task_results, device FROM executions {where}"
+            " ORDER BY seq DESC LIMIT ?",
+            (*params, limit + 1),
+        ).fetchall()
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        executions = [
+            TaskExecution(
+                id=row[1],
+                task_id=row[2],
+                task_name=row[3],
+                started_at=datetime.fromtimestamp(row[4]),
+                finished_at=(
+                    datetime.fromtimestamp(row[5]) if row[5] is not None else None
+                ),
+                status=row[6],
+                error_message=row[7],
+                task_results=json.loads(row[8]) if row[8] else [],
+                device=row[9],
+            )
+            for row in reversed(rows[:limit])
+        ]
+        return executions, next_cursor
+
+    def average_durations(self) -> Dict[str, Tuple[float, int]]:
+        """各定时任务成功执行的平均时长（秒）与样本数"""
+        rows = self._conn.execute(
+            "SELECT task_id, AVG(finished_at - started_at), COUNT(*) FROM executions"
+            " WHERE status = 'success' AND finished_at IS NOT NULL GROUP BY task_id"
+        )
+        return {task_id: (average, count) for task_id, average, count in rows}
+
+    def prune_executions(self, max_age_days: int, max_count: int) -> int:
+        """按保留天数与保留条数清理已结束的执行记录"""
+        deleted = 0
+        with self._conn:
+            if max_age_days > 0:
+                deadline = datetime.now().timestamp() - max_age_days * 86400
+                deleted += self._conn.execute(
+                    "DELETE FROM executions WHERE started_at < ?"
+                    " AND status NOT IN ('queued', 'running')",
+                    (deadline,),
+                ).rowcount
+            if max_count > 0:
+                deleted += self._conn.execute(
+                    "DELETE FROM executions WHERE status NOT IN ('queued', 'running')"
+                    " AND seq <= (SELECT seq FROM executions ORDER BY seq DESC"
+                    " LIMIT 1 OFFSET ?)",
+                    (max_count,),
+                ).rowcount
+        return deleted
+
+    def close(self):
+        self._conn.close()
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[float]:
+    return value.timestamp() if value is not None else None
+
+
+def _dump_results(execution: TaskExecution) -> Optional[str]:
+    if not execution.task_results:
+        return None
+    return json.dumps(
+        [result.model_dump() for result in execution.task_results], ensure_ascii=False
+    )
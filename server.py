@@ -0,0 +1,1040 @@
+import asyncio
+import json
+import threading
+import webbrowser
+from contextlib import asynccontextmanager
+from queue import SimpleQueue
+import os
+import signal
+import sys
+import platform
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from models.interface import load_interface
+from models.api import DeviceModel
+from models.task_config import TaskConfigModel
+from models.settings import SchedulerDevice, SettingsModel
+from models.scheduler import (
+    ScheduledTaskCreate,
+    ScheduledTaskUpdate,
+    TaskExecutionPayload,
+)
+from maa_utils import DEVICE_CACHE_TTL, MaaWorker
+from scheduler_manager import DEFAULT_DEVICE, SchedulerManager
+from startup import StartupGraph
+from http_cache import CachedResponse, PrecompressedStaticFiles
+import subprocess
+import time
+from datetime import datetime
+
+import profiler
+
+if not os.path.exists("config"):
+    os.makedirs("config")
+    with open("config/settings.json", "w", encoding="utf-8") as f:
+        json.dump(SettingsModel().model_dump(), f, indent=4, ensure_ascii=False)
+    with open("config/task_config.json", "w", encoding="utf-8") as f:
+        json.dump(TaskConfigModel().model_dump(), f, indent=4, ensure_ascii=False)
+
+with profiler.phase("interface"):
+    interface = load_interface()
+    # 运行期间 interface 不会变化，序列化结果只生成一次
+    interface_response = CachedResponse(
+        json.dumps(
+            interface.model_dump(mode="json"), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8"),
+        media_type="application/json",
+    )
+
+
+class LogBroadcaster:
+    def __init__(self):
+        self._queues: list[asyncio.Queue] = []
+
+    @property
+    def client_count(self) -> int:
+        return len(self._queues)
+
+    def add_client(self, history: list[str]) -> asyncio.Queue:
+        q = asyncio.Queue()
+        for msg in history:
+            q.put_nowait(msg)
+        self._queues.append(q)
+        return q
+
+    def remove_client(self, q: asyncio.Queue):
+        if q in self._queues:
+            self._queues.remove(q)
+
+    async def broadcast(self, message: str):
+        for q in self._queues:
+            await q.put(message)
+
+
+class AppState:
+    def __init__(self):
+        self.message_conn = SimpleQueue()
+        self.worker: MaaWorker | None = None
+        self.history_message = []
+        self.current_status = None
+        self.broadcaster: LogBroadcaster | None = None
+        self.device_broadcaster: LogBroadcaster | None = None
+        self.device_snapshot: str | None = None
+        self.startup: StartupGraph | None = None
+        self.scheduler_manager: SchedulerManager | None = None
+        # 设备池中除默认设备以外的设备
+        self.pool: list[tuple[MaaWorker, SchedulerDevice]] = []
+        self.settings: SettingsModel | None = None
+        self.subprocess_pipe: subprocess.Popen | None = None
+        self.update_status: dict | None = None
+        self.update_info: dict | None = None
+
+    def send_log(self, msg: str):
+        self.message_conn.put(
+            f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())} {msg}"
+        )
+
+
+app_state = AppState()
+
+
+async def log_monitor():
+    while True:
+        while not app_state.message_conn.empty():
+            msg = app_state.message_conn.get_nowait()
+            app_state.history_message.append(msg)
+            if app_state.broadcaster:
+                await app_state.broadcaster.broadcast(msg)
+        await asyncio.sleep(0.1)
+
+
+async def device_monitor():
+    # 定时在后台刷新设备列表，GET /api/device 直接返回缓存结果，变化时推送给订阅的客户端
+    await app_state.startup.wait_settled(["toolkit"])
+    app_state.worker.background_refresh = True
+    while True:
+        try:
+            devices = await asyncio.to_thread(app_state.worker.refresh_devices)
+            snapshot = json.dumps(
+                {"type": "devices", "data": devices}, ensure_ascii=False
+            )
+            if snapshot != app_state.device_snapshot:
+                app_state.device_snapshot = snapshot
+                await app_state.device_broadcaster.broadcast(snapshot)
+        except Exception as e:
+            app_state.send_log(f"刷新设备列表失败: {e}")
+        await asyncio.sleep(DEVICE_CACHE_TTL)
+
+
+def load_settings():
+    with open("config/settings.json", "r", encoding="utf-8") as f:
+        config_data = json.load(f)
+    app_state.settings = SettingsModel(**config_data)
+
+
+def load_agent():
+    app_state.worker.load_agent()
+    app_state.worker.send_log("Agent加载完成")
+
+
+def preload_resource():
+    # 后台预加载上次使用的资源
+    name = app_state.settings.panel.lastResource
+    if name not in [i.name for i in interface.resource]:
+        return
+    try:
+        app_state.worker.set_resource(name)
+    except Exception as e:
+        app_state.send_log(f"预加载资源失败: {e}")
+        raise
+
+
+def reconnect_device():
+    # 自动重连上次连接的设备
+    stored = app_state.settings.panel.lastConnectedDevice
+    if stored is None:
+        return
+    try:
+        app_state.worker.reconnect_last_device(stored)
+    except Exception as e:
+        app_state.send_log(f"自动重连设备失败: {e}")
+        raise
+
+
+async def init_scheduler():
+    # 设备池来自设置，读取设置失败时只使用默认设备
+    await app_state.startup.wait_settled(["settings"])
+    pool_settings = (app_state.settings or SettingsModel()).scheduler
+    scheduler_manager = SchedulerManager()
+    scheduler_manager.set_worker(app_state.worker, pool_settings.defaultGroups)
+    names = {DEFAULT_DEVICE}
+    for item in pool_settings.devices:
+        if item.name in names:
+            app_state.send_log(f"设备池中的设备名重复，已忽略: {item.name}")
+            continue
+        names.add(item.name)
+        worker = MaaWorker(app_state.message_conn, interface, item.name)
+        app_state.pool.append((worker, item))
+        scheduler_manager.register_worker(item.name, worker, item.groups)
+    # 停机期间错过的触发会在启动后立即补执行，需等任务依赖的阶段与设备池准备结束后再派发
+    scheduler_manager.set_dispatch_gate(
+        lambda: app_state.startup.wait_settled(TASK_PHASES + ["pool"])
+    )
+    await scheduler_manager.initialize()
+    app_state.scheduler_manager = scheduler_manager
+
+
+def prepare_pool_device(worker: MaaWorker, item: SchedulerDevice):
+    # 为设备池中的设备加载上次使用的资源并连接设备
+    name = app_state.settings.panel.lastResource
+    try:
+        if name in [i.name for i in interface.resource]:
+            worker.set_resource(name)
+        if not worker.reconnect_last_device(item.device):
+            worker.send_log("设备未连接，由该设备领取的定时任务将失败")
+    except Exception as e:
+        worker.send_log(f"准备设备池中的设备失败: {e}")
+
+
+async def prepare_pool():
+    if not app_state.pool:
+        return
+    # 默认设备导入 Agent 模块后再逐个注册，避免并发修改导入链与 Agent 缓存
+    await app_state.startup.wait_settled(["agent"])
+    for worker, _ in app_state.pool:
+        await asyncio.to_thread(worker.load_agent, False)
+    await asyncio.gather(
+        *(
+            asyncio.to_thread(prepare_pool_device, worker, item)
+            for worker, item in app_state.pool
+        )
+    )
+
+
+def open_browser():
+    webbrowser.open_new("http://127.0.0.1:55666")
+
+
+# 执行任务前需要结束的启动阶段：Toolkit 初始化、Agent 注册、资源加载与设备重连
+TASK_PHASES = ["toolkit", "agent", "resource", "device"]
+
+
+def build_startup_graph() -> StartupGraph:
+    graph = StartupGraph()
+    graph.add("toolkit", app_state.worker.init_toolkit)
+    graph.add("settings", load_settings)
+    graph.add("agent", load_agent, ["toolkit"])
+    graph.add("resource", preload_resource, ["toolkit", "settings"])
+    graph.add("device", reconnect_device, ["toolkit", "settings"])
+    graph.add("scheduler", init_scheduler)
+    graph.add("pool", prepare_pool, ["toolkit", "scheduler"])
+    graph.add("browser", open_browser)
+    return graph
+
+
+async def run_startup():
+    await app_state.startup.run()
+    profiler.write_report(app_state.startup.report())
+    if profiler.EXIT_AFTER_REPORT:
+        # 启动耗时检查模式：报告写入后按正常流程退出
+        signal.raise_signal(signal.SIGINT)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app_state.worker = MaaWorker(app_state.message_conn, interface)
+    app_state.broadcaster = LogBroadcaster()
+    app_state.device_broadcaster = LogBroadcaster()
+    monitor_task = asyncio.create_task(log_monitor())
+    # 启动阶段在后台并发执行，服务立即开始接受请求
+    app_state.startup = build_startup_graph()
+    startup_task = asyncio.create_task(run_startup())
+    device_task = asyncio.create_task(device_monitor())
+    yield
+    startup_task.cancel()
+    monitor_task.cancel()
+    device_task.cancel()
+    if app_state.worker and app_state.worker.agent_process:
+        app_state.worker.agent_process.terminate()
+    # 关闭调度器
+    if app_state.scheduler_manager:
+        await app_state.scheduler_manager.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+app.mount("/assets", PrecompressedStaticFiles(directory="page/assets"))
+app.mount("/resource", StaticFiles(directory="resource"))
+
+with open("page/index.html", "rb") as f:
+    index_response = CachedResponse(f.read(), media_type="text/html; charset=utf-8")
+
+
+SPA_EXCLUDED_PREFIXES = ("/api/", "/assets/", "/resource/")
+
+
+async def spa_fallback(scope, receive, send):
+    """未匹配任何路由时返回前端页面，交给前端路由处理
+
+    作为路由器的默认处理器，只在没有路由匹配时才会执行，不包裹其他响应。
+    """
+    if scope["type"] == "http" and not scope["path"].startswith(SPA_EXCLUDED_PREFIXES):
+        response = index_response(Request(scope))
+        await response(scope, receive, send)
+        return
+    await app.router.not_found(scope, receive, send)
+
+
+app.router.default = spa_fallback
+
+
+@app.get("/")
+async def serve_homepage(request: Request):
+    return index_response(request)
+
+
+@app.get("/api/ready")
+def get_ready():
+    if app_state.startup is None:
+        return {"status": "success", "ready": False, "phases": []}
+    return {"status": "success", **app_state.startup.report()}
+
+
+@app.get("/api/interface")
+def get_interface(request: Request):
+    return interface_response(request)
+
+
+async def video_stream_generator(fps: int = 15):
+    fps = max(1, min(60, fps))
+    interval = 1.0 / fps
+
+    while True:
+        if app_state.worker and app_state.worker.connected:
+            frame_bytes = await asyncio.to_thread(app_state.worker.get_screencap_bytes)
+            if frame_bytes:
+                yield (
+                    b"--frame\r\n"
+                    b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n"
+                )
+                await asyncio.sleep(interval)
+                continue
+        await asyncio.sleep(0.5)
+
+
+@app.get("/api/stream/live")
+async def stream_live(fps: int = 15):
+    return StreamingResponse(
+        video_stream_generator(fps),
+        media_type="multipart/x-mixed-replace; boundary=frame",
+    )
+
+
+@app.get("/api/device")
+def get_device(controller: str | None = None, refresh: bool = False):
+    data = app_state.worker.get_device(controller, refresh)
+    return {"status": "success", "data": data}
+
+
+@app.get("/api/device/events")
+async def stream_device_events(request: Request):
+    history = [app_state.device_snapshot] if app_state.device_snapshot else []
+    q = app_state.device_broadcaster.add_client(history)
+
+    async def event_generator():
+        try:
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    data = await asyncio.wait_for(q.get(), timeout=1.0)
+                    yield f"data: {data}\n\n"
+                except asyncio.TimeoutError:
+                    continue
+        except asyncio.CancelledError:
+            pass
+        finally:
+            app_state.device_broadcaster.remove_client(q)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
+        },
+    )
+
+
+@app.post("/api/device")
+async def connect_device(device: DeviceModel):
+    if await asyncio.to_thread(app_state.worker.connect_device, device):
+        return {"status": "success"}
+    app_state.send_log("设备连接失败")
+    return {"status": "failed"}
+
+
+@app.get("/api/resource")
+def get_resource():
+    return {"status": "success", "resource": [i.name for i in interface.resource]}
+
+
+@app.post("/api/resource")
+async def set_resource(name: str):
+    # 设置资源
+    try:
+        await asyncio.to_thread(app_state.worker.set_resource, name)
+    except Exception as e:
+        app_state.send_log(f"设置资源失败: {e}")
+        return {"status": "failed", "message": str(e)}
+    return {"status": "success"}
+
+
+@app.get("/api/settings")
+def get_settings():
+    with open("config/settings.json", "r", encoding="utf-8") as f:
+        config_data = json.load(f)
+    app_state.settings = SettingsModel(**config_data)
+    return {"status": "success", "settings": app_state.settings.model_dump()}
+
+
+@app.post("/api/settings")
+def set_settings(settings: SettingsModel):
+    with open("config/settings.json", "w", encoding="utf-8") as f:
+        json.dump(settings.model_dump(), f, indent=4, ensure_ascii=False)
+    return {"status": "success"}
+
+
+@app.get("/api/task-config")
+def get_task_config():
+    try:
+        with open("config/task_config.json", "r", encoding="utf-8") as f:
+            config_data = json.load(f)
+        task_config = TaskConfigModel(**config_data)
+        return {"status": "success", "config": task_config.model_dump()}
+    except FileNotFoundError:
+        return {"status": "success", "config": TaskConfigModel().model_dump()}
+    except Exception as e:
+        app_state.send_log(f"获取任务配置失败: {e}")
+        return {"status": "failed", "message": str(e)}
+
+
+@app.post("/api/task-config")
+def save_task_config(config: TaskConfigModel):
+    try:
+        with open("config/task_config.json", "w", encoding="utf-8") as f:
+            json.dump(config.model_dump(), f, indent=4, ensure_ascii=False)
+        return {"status": "success"}
+    except Exception as e:
+        app_state.send_log(f"保存任务配置失败: {e}")
+        return {"status": "failed", "message": str(e)}
+
+
+@app.delete("/api/task-config")
+def reset_task_config():
+    try:
+        config_path = "config/task_config.json"
+        if os.path.exists(config_path):
+            os.remove(config_path)
+        return {"status": "success"}
+    except Exception as e:
+        app_state.send_log(f"重置任务配置失败: {e}")
+        return {"status": "failed", "message": str(e)}
+
+
+def _get_platform_info():
+    """获取当前平台和架构信息"""
+    plat = "linux"
+    match platform.system():
+        case "Windows":
+            plat = "win"
+        case "Darwin":
+            plat = "macos"
+        case "Linux":
+            plat = "linux"
+
+    arch = "x86_64"
+    machine = platform.machine().lower()
+    match machine:
+        case "x86_64" | "amd64":
+            arch = "x86_64"
+        case "arm" | "aarch64" | "arm64":
+            arch = "aarch64"
+
+    return plat, arch
+
+
+MIRRORCHYAN_API_BASES = [
+    "https://mirrorchyan.com/api/resources",
+    "https://mirrorchyan.net/api/resources",
+]
+
+
+def _check_mirrorchyan_update(rid: str, current_version: str, cdk: str):
+    """通过 Mirror酱 API 检查更新"""
+    import httpx
+
+    plat, arch = _get_platform_info()
+    params = {
+        "current_version": current_version,
+        "user_agent": "MWU",
+        "os": plat,
+        "arch": arch,
+        "channel": app_state.settings.update.updateChannel,
+    }
+    if cdk:
+        params["cdk"] = cdk
+
+    proxy = app_state.settings.update.proxy or None
+
+    for api_base in MIRRORCHYAN_API_BASES:
+        try:
+            resp = httpx.get(
+                f"{api_base}/{rid}/latest",
+                params=params,
+                proxy=proxy,
+                timeout=15,
+            )
+            data = resp.json()
+            if data.get("code") == 0:
+                return data
+        except Exception:
+            continue
+
+    return None
+
+
+def _check_github_update():
+    """通过 GitHub Releases API 检查更新"""
+    import httpx
+
+    repo_name = interface.github.split("/")[3] + "/" + interface.github.split("/")[4]
+    proxy = app_state.settings.update.proxy or None
+    response = httpx.get(
+        f"https://api.github.com/repos/{repo_name}/releases/latest",
+        proxy=proxy,
+        timeout=15,
+    ).json()
+    latest_version = response["tag_name"]
+    current_version = interface.version
+
+    plat, arch = _get_platform_info()
+
+    for asset in response.get("assets", []):
+        if f"{plat}-{arch}" in asset["name"]:
+            download_url = asset["browser_download_url"]
+            file_hash = asset.get("digest", "").replace("sha256:", "").strip()
+            return {
+                "latest_version": latest_version,
+                "current_version": current_version,
+                "is_update_available": latest_version != current_version,
+                "release_notes": response.get("body", ""),
+                "download_url": download_url,
+                "file_hash": file_hash,
+                "file_size": asset.get("size"),
+                "file_name": asset["name"],
+                "download_source": "github",
+            }
+    return None
+
+
+@app.get("/api/update/check")
+def check_update():
+    try:
+        current_version = interface.version or ""
+        mirrorchyan_rid = getattr(interface, "mirrorchyan_rid", None)
+        cdk = app_state.settings.update.mirrorchyanCdk if app_state.settings else ""
+
+        if mirrorchyan_rid:
+            mc_data = _check_mirrorchyan_update(mirrorchyan_rid, current_version, cdk)
+            if mc_data and mc_data.get("code") == 0:
+                mc_info = mc_data.get("data", {})
+                latest_version = mc_info.get("version_name", "")
+                has_update = latest_version and latest_version != current_version
+
+                app_state.update_info = {
+                    "latest_version": latest_version,
+                    "current_version": current_version,
+                    "is_update_available": has_update,
+                    "release_notes": mc_info.get("release_note", ""),
+                    "download_url": mc_info.get("url", ""),
+                    "file_hash": mc_info.get("sha256", ""),
+                    "file_size": mc_info.get("filesize"),
+                    "file_name": f"update-{latest_version}.7z",
+                    "download_source": "mirrorchyan",
+                    "update_type": mc_info.get("update_type", "full"),
+                }
+
+                # 有 CDK 且有下载链接，直接返回 mirrorchyan 结果
+                if app_state.update_info["download_url"]:
+                    return {
+                        "status": "success",
+                        "update_info": app_state.update_info,
+                    }
+
+                # 无 CDK 或无下载链接，尝试 GitHub 获取下载链接
+                if has_update and interface.github:
+                    try:
+                        gh_info = _check_github_update()
+                        if gh_info:
+                            # 保留 mirrorchyan 的版本信息，用 GitHub 的下载链接
+                            app_state.update_info["download_url"] = gh_info[
+                                "download_url"
+                            ]
+                            app_state.update_info["file_hash"] = gh_info["file_hash"]
+                            app_state.update_info["file_size"] = gh_info["file_size"]
+                            app_state.update_info["file_name"] = gh_info["file_name"]
+                            app_state.update_info["download_source"] = "github"
+                    except Exception:
+                        pass
+
+                return {
+                    "status": "success",
+                    "update_info": app_state.update_info,
+                }
+
+        if interface.github:
+            gh_info = _check_github_update()
+            if gh_info:
+                app_state.update_info = gh_info
+                return {"status": "success", "update_info": app_state.update_info}
+
+            plat, arch = _get_platform_info()
+            msg = f"未找到适合当前平台的更新包:{plat}-{arch}"
+            app_state.send_log(msg)
+            return {
+                "status": "failed",
+                "message": msg,
+            }
+
+        msg = "未配置更新源"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    except Exception as e:
+        msg = str(e)
+        app_state.send_log(f"检查更新失败: {msg}")
+        return {"status": "failed", "message": msg}
+
+
+async def download_file(
+    url: str,
+    dest: str,
+    use_proxy: bool = True,
+    expected_hash: str = "",
+    expected_size: int | None = None,
+    on_progress=None,
+) -> str:
+    """下载文件并校验大小与 SHA-256，返回哈希值，支持断点续传与分段下载"""
+    from downloader import download
+
+    return await download(
+        url,
+        dest,
+        proxy=app_state.settings.update.proxy if use_proxy else None,
+        expected_hash=expected_hash,
+        expected_size=expected_size,
+        segments=app_state.settings.update.downloadSegments,
+        on_progress=on_progress,
+    )
+
+
+@app.get("/api/update")
+async def perform_update():
+    try:
+        update_package_path = app_state.update_info["file_name"]
+        download_url = app_state.update_info["download_url"]
+        download_source = app_state.update_info.get("download_source", "github")
+        if os.path.exists(update_package_path):
+            os.remove(update_package_path)
+        app_state.update_status = {
+            "status": "downloading",
+            "message": "正在下载更新包...",
+        }
+
+        def on_progress(progress: dict):
+            app_state.update_status = {
+                "status": "downloading",
+                "message": "正在下载更新包...",
+                "progress": progress,
+            }
+
+        try:
+            use_proxy = download_source != "mirrorchyan"
+            await download_file(
+                download_url,
+                update_package_path,
+                use_proxy,
+                app_state.update_info.get("file_hash", ""),
+                app_state.update_info.get("file_size"),
+                on_progress,
+            )
+        except Exception as e:
+            msg = f"下载失败: {e}"
+            app_state.send_log(msg)
+            app_state.update_status = {"status": "failed", "message": msg}
+            return {"status": "failed", "message": str(e)}
+
+        def run_updater_loop():
+            app_state.update_status = {
+                "status": "updating",
+                "message": "正在运行更新器...",
+            }
+            while True:
+                cmd = [
+                    "./mwu-updater",
+                    "-archive",
+                    os.path.abspath(update_package_path),
+                    "-webhook",
+                    "http://127.0.0.1:55666/api/system/shutdown",
+                    "-restart-cmd",
+                    sys.executable,
+                ]
+
+                try:
+                    process = subprocess.Popen(
+                        cmd,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        text=True,
+                        encoding="utf-8",
+                        errors="replace",
+                    )
+
+                    if process.stdout:
+                        for line in process.stdout:
+                            print(f"[Updater] {line.strip()}")
+                            try:
+                                data = json.loads(line)
+                                if "status" in data:
+                                    app_state.update_status = data
+                            except json.JSONDecodeError:
+                                pass
+                except Exception as e:
+                    msg = f"启动更新器失败: {e}"
+                    app_state.send_log(msg)
+                    app_state.update_status = {
+                        "status": "failed",
+                        "message": msg,
+                    }
+                    break
+
+                process.wait()
+
+                if process.returncode == 10:
+                    app_state.update_status = {
+                        "status": "updating",
+                        "message": "更新器自更新完成，正在重启更新器...",
+                    }
+                    continue
+                else:
+                    if process.returncode != 0:
+                        msg = f"更新器异常退出: {process.returncode}，请查看updater.log"
+                        app_state.send_log(msg)
+                        app_state.update_status = {
+                            "status": "failed",
+                            "message": msg,
+                        }
+                    break
+
+        threading.Thread(target=run_updater_loop, daemon=True).start()
+        return {"status": "success", "message": "正在后台更新程序..."}
+    except Exception as e:
+        msg = str(e)
+        app_state.send_log(f"更新失败: {msg}")
+        app_state.update_status = {"status": "failed", "message": msg}
+        return {"status": "failed", "message": msg}
+
+
+@app.get("/api/update/status")
+def get_update_status():
+    if app_state.update_status is None:
+        return {"status": "idle", "message": "没有正在进行的更新"}
+    return app_state.update_status
+
+
+@app.get("/api/system/shutdown")
+def system_shutdown():
+    def _shutdown():
+        time.sleep(1)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    threading.Thread(target=_shutdown, daemon=True).start()
+    return {"status": "success", "message": "Shutting down"}
+
+
+@app.post("/api/test-notification")
+def test_notification():
+    if app_state.worker is None:
+        msg = "Worker未初始化"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    try:
+        app_state.worker.send_notification("测试通知", "这是一条测试通知。")
+        return {"status": "success"}
+    except Exception as e:
+        msg = str(e)
+        app_state.send_log(f"发送测试通知失败: {msg}")
+        return {"status": "failed", "message": msg}
+
+
+@app.post("/api/start")
+def start(task_execution: TaskExecutionPayload):
+    if app_state.worker and app_state.worker.running:
+        msg = "任务已开始"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    if app_state.startup is None or not all(
+        app_state.startup.settled(name) for name in TASK_PHASES
+    ):
+        msg = "正在初始化 MAA、Agent、资源与设备，请稍后再试"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    if not app_state.worker.connected:
+        msg = "请先连接设备"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    app_state.worker.start_task(task_execution.task_list, task_execution.task_options)
+    return {"status": "success"}
+
+
+@app.post("/api/stop")
+def stop():
+    if app_state.worker is None or not app_state.worker.running:
+        msg = "任务未开始"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    app_state.worker.stop_task()
+    return {"status": "success"}
+
+
+@app.get("/api/logs")
+async def stream_logs(request: Request):
+    q = app_state.broadcaster.add_client(app_state.history_message)
+
+    async def event_generator():
+        try:
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    data = await asyncio.wait_for(q.get(), timeout=1.0)
+                    yield f"data: {json.dumps({'type': 'log', 'message': data}, ensure_ascii=False)}\n\n"
+                except asyncio.TimeoutError:
+                    continue
+        except asyncio.CancelledError:
+            pass
+        finally:
+            app_state.broadcaster.remove_client(q)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
+        },
+    )
+
+
+@app.get("/api/scheduler/tasks")
+async def get_scheduler_tasks():
+    """获取所有定时任务"""
+    if app_state.scheduler_manager is None:
+        msg = "调度器未初始化"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    try:
+        tasks = await app_state.scheduler_manager.get_all_tasks_json()
+        return Response(
+            b'{"status":"success","tasks":' + tasks + b"}",
+            media_type="application/json",
+        )
+    except Exception as e:
+        msg = str(e)
+        app_state.send_log(f"获取调度任务失败: {msg}")
+        return {"status": "failed", "message": msg}
+
+
+@app.post("/api/scheduler/tasks")
+async def create_scheduler_task(task_create: ScheduledTaskCreate):
+    """创建定时任务"""
+    if app_state.scheduler_manager is None:
+        msg = "调度器未初始化"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    try:
+        task = await app_state.scheduler_manager.create_task(task_create)
+        return {"status": "success", "task": task.model_dump()}
+    except Exception as e:
+        msg = str(e)
+        app_state.send_log(f"创建调度任务失败: {msg}")
+        return {"status": "failed", "message": msg}
+
+
+@app.put("/api/scheduler/tasks/{task_id}")
+async def update_scheduler_task(task_id: str, task_update: ScheduledTaskUpdate):
+    """更新定时任务"""
+    if app_state.scheduler_manager is None:
+        msg = "调度器未初始化"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    try:
+        task = await app_state.scheduler_manager.update_task(task_id, task_update)
+        if task is None:
+            msg = "任务不存在"
+            app_state.send_log(msg)
+            return {"status": "failed", "message": msg}
+        return {"status": "success", "task": task.model_dump()}
+    except Exception as e:
+        msg = str(e)
+        app_state.send_log(f"更新调度任务失败: {msg}")
+        return {"status": "failed", "message": msg}
+
+
+@app.delete("/api/scheduler/tasks/{task_id}")
+async def delete_scheduler_task(task_id: str):
+    """删除定时任务"""
+    if app_state.scheduler_manager is None:
+        msg = "调度器未初始化"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    try:
+        success = await app_state.scheduler_manager.delete_task(task_id)
+        if success:
+            return {"status": "success"}
+        msg = "任务不存在"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    except Exception as e:
+        msg = str(e)
+        app_state.send_log(f"删除调度任务失败: {msg}")
+        return {"status": "failed", "message": msg}
+
+
+@app.post("/api/scheduler/tasks/{task_id}/pause")
+async def pause_scheduler_task(task_id: str):
+    """暂停定时任务"""
+    if app_state.scheduler_manager is None:
+        msg = "调度器未初始化"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    try:
+        success = await app_state.scheduler_manager.pause_task(task_id)
+        if success:
+            return {"status": "success"}
+        msg = "任务不存在"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    except Exception as e:
+        msg = str(e)
+        app_state.send_log(f"暂停调度任务失败: {msg}")
+        return {"status": "failed", "message": msg}
+
+
+@app.post("/api/scheduler/tasks/{task_id}/resume")
+async def resume_scheduler_task(task_id: str):
+    """恢复定时任务"""
+    if app_state.scheduler_manager is None:
+        msg = "调度器未初始化"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    try:
+        success = await app_state.scheduler_manager.resume_task(task_id)
+        if success:
+            return {"status": "success"}
+        msg = "任务不存在"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    except Exception as e:
+        msg = str(e)
+        app_state.send_log(f"恢复调度任务失败: {msg}")
+        return {"status": "failed", "message": msg}
+
+
+@app.get("/api/scheduler/queue")
+async def get_scheduler_queue():
+    """获取各设备运行队列状态"""
+    if app_state.scheduler_manager is None:
+        msg = "调度器未初始化"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    try:
+        queues = await app_state.scheduler_manager.get_queue_status()
+        return {
+            "status": "success",
+            "queues": [queue.model_dump() for queue in queues],
+        }
+    except Exception as e:
+        msg = str(e)
+        app_state.send_log(f"获取运行队列失败: {msg}")
+        return {"status": "failed", "message": msg}
+
+
+@app.get("/api/scheduler/devices")
+async def get_scheduler_devices():
+    """获取各设备的占用统计"""
+    if app_state.scheduler_manager is None:
+        msg = "调度器未初始化"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    try:
+        devices = await app_state.scheduler_manager.get_device_stats()
+        return {
+            "status": "success",
+            "devices": [device.model_dump() for device in devices],
+        }
+    except Exception as e:
+        msg = str(e)
+        app_state.send_log(f"获取设备统计失败: {msg}")
+        return {"status": "failed", "message": msg}
+
+
+@app.get("/api/scheduler/preview")
+async def get_scheduler_preview(
+    hours: float = Query(24, gt=0, le=24 * 31),
+    limit: int = Query(200, ge=1, le=10000),
+    min_gap: float = Query(30, ge=0),
+):
+    """预测未来 hours 小时内的触发时间，标记预计冲突与 min_gap 分钟以上的空闲时段"""
+    if app_state.scheduler_manager is None:
+        msg = "调度器未初始化"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    try:
+        preview = await app_state.scheduler_manager.preview(hours, limit, min_gap)
+        return {"status": "success", "preview": preview.model_dump()}
+    except Exception as e:
+        msg = str(e)
+        app_state.send_log(f"获取调度预览失败: {msg}")
+        return {"status": "failed", "message": msg}
+
+
+@app.get("/api/scheduler/executions")
+async def get_scheduler_executions(
+    limit: int = Query(50, ge=1, le=1000),
+    task_id: str | None = None,
+    status: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    cursor: int | None = None,
+):
+    """获取执行历史，支持按任务、状态与时间范围筛选，使用 cursor 向前翻页"""
+    if app_state.scheduler_manager is None:
+        msg = "调度器未初始化"
+        app_state.send_log(msg)
+        return {"status": "failed", "message": msg}
+    try:
+        executions, next_cursor = await app_state.scheduler_manager.get_executions(
+            limit, task_id, status, since, until, cursor
+        )
+        return {
+            "status": "success",
+            "executions": [exec.model_dump() for exec in executions],
+            "next_cursor": next_cursor,
+        }
+    except Exception as e:
+        msg = str(e)
+        app_state.send_log(f"获取调度执行历史失败: {msg}")
+        return {"status": "failed", "message": msg}
@@ -0,0 +1,112 @@
+import asyncio
+import inspect
+import logging
+import time
+import traceback
+from typing import Any, Callable, Literal
+
+logger = logging.getLogger(__name__)
+
+
+class StartupPhase:
+    """启动阶段"""
+
+    def __init__(self, name: str, func: Callable[[], Any], deps: list[str]):
+        self.name = name
+        self.func = func
+        self.deps = deps
+        self.status: Literal["pending", "running", "done", "failed", "skipped"] = (
+            "pending"
+        )
+        self.started_at: float | None = None
+        self.duration: float | None = None
+        self.error: str | None = None
+        self.done = asyncio.Event()
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "deps": self.deps,
+            "status": self.status,
+            "duration": self.duration,
+            "error": self.error,
+        }
+
+
+class StartupGraph:
+    """启动依赖图
+
+    互不依赖的阶段并发执行，同步函数放到线程中运行，协程函数在事件循环中运行。
+    某阶段失败时，依赖它的阶段会被跳过。
+    """
+
+    def __init__(self):
+        self._phases: dict[str, StartupPhase] = {}
+        self.started_at: float | None = None
+        self.duration: float | None = None
+
+    def add(self, name: str, func: Callable[[], Any], deps: list[str] | None = None):
+        self._phases[name] = StartupPhase(name, func, deps or [])
+
+    @property
+    def ready(self) -> bool:
+        return all(phase.status == "done" for phase in self._phases.values())
+
+    @property
+    def finished(self) -> bool:
+        return all(phase.done.is_set() for phase in self._phases.values())
+
+    def settled(self, name: str) -> bool:
+        """阶段是否已结束（无论成功、失败或跳过）"""
+        phase = self._phases.get(name)
+        return phase is None or phase.done.is_set()
+
+    async def wait_settled(self, names: list[str]):
+        """等待各阶段结束，不要求成功"""
+        for name in names:
+            phase = self._phases.get(name)
+            if phase is not None:
+                await phase.done.wait()
+
+    async def _run_phase(self, phase: StartupPhase):
+        try:
+            for dep in phase.deps:
+                await self._phases[dep].done.wait()
+            failed = [dep for dep in phase.deps if self._phases[dep].status != "done"]
+            if failed:
+                phase.status = "skipped"
+                phase.error = f"依赖阶段未完成: {', '.join(failed)}"
+                return
+            phase.status = "running"
+            phase.started_at = time.perf_counter()
+            if inspect.iscoroutinefunction(phase.func):
+                await phase.func()
+            else:
+                await asyncio.to_thread(phase.func)
+            phase.status = "done"
+        except Exception as e:
+            phase.status = "failed"
+            phase.error = str(e)
+            logger.error(f"启动阶段 {phase.name} 失败: {e}")
+            traceback.print_exc()
+        finally:
+            if phase.started_at is not None:
+                phase.duration = time.perf_counter() - phase.started_at
+            phase.done.set()
+
+    async def run(self):
+        self.started_at = time.perf_counter()
+        try:
+            await asyncio.gather(
+                *(self._run_phase(phase) for phase in self._phases.values())
+            )
+        finally:
+            self.duration = time.perf_counter() - self.started_at
+
+    def report(self) -> dict:
+        return {
+            "ready": self.ready,
+            "finished": self.finished,
+            "duration": self.duration,
+            "phases": [phase.to_dict() for phase in self._phases.values()],
+        }
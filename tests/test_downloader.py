@@ -0,0 +1,260 @@
+"""
+downloader 的断点续传与分段下载测试
+
+使用本地支持 Range 的 HTTP 服务模拟更新源，可模拟连接中途断开与不支持 Range 的服务器。
+在项目目录下运行: python -m unittest discover tests
+"""
+
+import hashlib
+import os
+import re
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import downloader  # noqa: E402
+
+DATA = os.urandom(300_000)
+DATA_HASH = hashlib.sha256(DATA).hexdigest()
+
+
+class RangeServer(ThreadingHTTPServer):
+    """支持 Range 请求的本地服务，drops 次响应只发送一半数据就断开连接
+
+    probe_only 为 True 时只响应探测用的 bytes=0-0，其他 Range 请求返回完整文件。
+    """
+
+    def __init__(self, drops: int = 0, ranges: bool = True, probe_only: bool = False):
+        super().__init__(("127.0.0.1", 0), RangeHandler)
+        self.drops = drops
+        self.ranges = ranges
+        self.probe_only = probe_only
+        self.requests: list[str | None] = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/package.zip"
+
+    def take_drop(self) -> bool:
+        with self._lock:
+            if self.drops > 0:
+                self.drops -= 1
+                return True
+            return False
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server: RangeServer = self.server
+        header = self.headers.get("Range")
+        server.requests.append(header)
+        start, end, status = 0, len(DATA) - 1, 200
+        if (
+            header
+            and server.ranges
+            and not (server.probe_only and header != "bytes=0-0")
+        ):
+            match = re.fullmatch(r"bytes=(\d+)-(\d*)", header)
+            start = int(match[1])
+            end = int(match[2]) if match[2] else len(DATA) - 1
+            if start >= len(DATA):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(DATA)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+        body = DATA[start : end + 1]
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(DATA)}")
+        self.end_headers()
+        if len(body) > 1 and server.take_drop():
+            self.wfile.write(body[: len(body) // 2])
+            self.wfile.flush()
+            self.connection.shutdown(socket.SHUT_RDWR)
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+class DownloadTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.temp_dir.name, "package.zip")
+        for name, value in (
+            ("RETRY_DELAY", 0),
+            ("SEGMENT_MIN_SIZE", 1024),
+            ("CHUNK_SIZE", 16 * 1024),
+        ):
+            patcher = mock.patch.object(downloader, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def serve(self, **kwargs) -> RangeServer:
+        server = RangeServer(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def files(self) -> list[str]:
+        return sorted(os.listdir(self.temp_dir.name))
+
+    def part_path(self, url: str) -> str:
+        return f"{self.dest}.{hashlib.sha1(url.encode()).hexdigest()[:8]}.part"
+
+    async def test_download_and_verify(self):
+        server = self.serve()
+        reports = []
+        file_hash = await downloader.download(
+            server.url, self.dest, None, DATA_HASH, len(DATA), 1, reports.append
+        )
+        self.assertEqual(file_hash, DATA_HASH)
+        self.assertEqual(Path(self.dest).read_bytes(), DATA)
+        self.assertEqual(self.files(), ["package.zip"])
+        self.assertEqual(reports[-1]["downloaded"], len(DATA))
+        self.assertEqual(reports[-1]["total"], len(DATA))
+
+    async def test_resume_after_drop(self):
+        server = self.serve(drops=2)
+        file_hash = await downloader.download(
+            server.url, self.dest, None, DATA_HASH, len(DATA)
+        )
+        self.assertEqual(file_hash, DATA_HASH)
+        self.assertIsNone(server.requests[0])
+        self.assertTrue(all(r.startswith("bytes=") for r in server.requests[1:]))
+        self.assertEqual(len(server.requests), 3)
+
+    async def test_resume_part_from_previous_attempt(self):
+        server = self.serve(drops=1)
+        with mock.patch.object(downloader, "MAX_RETRIES", 0):
+            with self.assertRaises(downloader.httpx.TransportError):
+                await downloader.download(server.url, self.dest, None, DATA_HASH)
+        part = self.part_path(server.url)
+        offset = os.path.getsize(part)
+        self.assertGreater(offset, 0)
+
+        file_hash = await downloader.download(server.url, self.dest, None, DATA_HASH)
+        self.assertEqual(file_hash, DATA_HASH)
+        self.assertEqual(server.requests[-1], f"bytes={offset}-")
+        self.assertEqual(self.files(), ["package.zip"])
+
+    async def test_complete_part_is_not_downloaded_again(self):
+        server = self.serve()
+        Path(self.part_path(server.url)).write_bytes(DATA)
+        file_hash = await downloader.download(
+            server.url, self.dest, None, DATA_HASH, len(DATA)
+        )
+        self.assertEqual(file_hash, DATA_HASH)
+        self.assertEqual(server.requests, [f"bytes={len(DATA)}-"])
+
+    async def test_server_without_range_restarts(self):
+        server = self.serve(drops=1, ranges=False)
+        file_hash = await downloader.download(
+            server.url, self.dest, None, DATA_HASH, len(DATA)
+        )
+        self.assertEqual(file_hash, DATA_HASH)
+        self.assertEqual(Path(self.dest).read_bytes(), DATA)
+
+    async def test_segmented_download(self):
+        server = self.serve(drops=3)
+        file_hash = await downloader.download(
+            server.url, self.dest, None, DATA_HASH, len(DATA), 4
+        )
+        self.assertEqual(file_hash, DATA_HASH)
+        self.assertEqual(Path(self.dest).read_bytes(), DATA)
+        self.assertEqual(server.requests[0], "bytes=0-0")
+        self.assertGreaterEqual(len(server.requests), 1 + 4 + 3)
+        self.assertEqual(self.files(), ["package.zip"])
+
+    async def test_segmented_falls_back_without_range(self):
+        server = self.serve(ranges=False)
+        file_hash = await downloader.download(
+            server.url, self.dest, None, DATA_HASH, len(DATA), 4
+        )
+        self.assertEqual(file_hash, DATA_HASH)
+
+    async def test_hash_mismatch_removes_file(self):
+        server = self.serve()
+        with self.assertRaisesRegex(ValueError, "哈希校验失败"):
+            await downloader.download(server.url, self.dest, None, "0" * 64)
+        self.assertEqual(self.files(), [])
+
+    async def test_size_mismatch_aborts_before_download(self):
+        server = self.serve()
+        with self.assertRaisesRegex(ValueError, "文件大小不符"):
+            await downloader.download(server.url, self.dest, None, "", len(DATA) + 1)
+        self.assertEqual(self.files(), [])
+
+    async def test_stale_parts_are_removed(self):
+        server = self.serve()
+        stale = f"{self.dest}.deadbeef.part"
+        Path(stale).write_bytes(b"old")
+        await downloader.download(server.url, self.dest, None, DATA_HASH)
+        self.assertFalse(os.path.exists(stale))
+
+    async def test_segment_parts_are_kept_for_resume(self):
+        server = self.serve(drops=4)
+        with mock.patch.object(downloader, "MAX_RETRIES", 0):
+            with self.assertRaises(downloader.httpx.TransportError):
+                await downloader.download(
+                    server.url, self.dest, None, DATA_HASH, len(DATA), 4
+                )
+        parts = self.files()
+        self.assertTrue(parts)
+        self.assertTrue(all(".part" in name for name in parts))
+
+        requests = len(server.requests)
+        file_hash = await downloader.download(
+            server.url, self.dest, None, DATA_HASH, len(DATA), 4
+        )
+        self.assertEqual(file_hash, DATA_HASH)
+        self.assertEqual(self.files(), ["package.zip"])
+        # 续传的请求从分段中已下载的位置开始，而不是分段起点
+        starts = {0, 75000, 150000, 225000}
+        resumed = [
+            int(header[6:].split("-")[0]) for header in server.requests[requests + 1 :]
+        ]
+        self.assertTrue(any(start not in starts for start in resumed))
+
+    async def test_parts_from_other_layouts_are_removed(self):
+        server = self.serve()
+        part = self.part_path(server.url)
+        Path(f"{part}0of2").write_bytes(b"old")
+        Path(part).write_bytes(b"old")
+        file_hash = await downloader.download(
+            server.url, self.dest, None, DATA_HASH, len(DATA), 4
+        )
+        self.assertEqual(file_hash, DATA_HASH)
+        self.assertEqual(self.files(), ["package.zip"])
+
+    async def test_segment_parts_removed_on_failure(self):
+        server = self.serve(probe_only=True)
+        with self.assertRaisesRegex(ValueError, "不支持分段下载"):
+            await downloader.download(
+                server.url, self.dest, None, DATA_HASH, len(DATA), 4
+            )
+        self.assertEqual(self.files(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
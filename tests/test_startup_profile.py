@@ -0,0 +1,72 @@
+"""
+启动耗时预算检查测试
+
+在临时项目目录中以 --profile-exit 启动程序，确认启动完成后写入报告并退出，
+超出 MWU_STARTUP_BUDGET_MS 时退出码为 1。
+在项目目录下运行: python -m unittest discover tests
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+MAIN = Path(__file__).resolve().parent.parent / "main.py"
+
+INTERFACE = {
+    "interface_version": 2,
+    "name": "Demo",
+    "version": "v1.0.0",
+    "controller": [{"name": "adb", "type": "Adb"}],
+    "resource": [{"name": "Official", "path": ["{PROJECT_DIR}/resource/base"]}],
+    "task": [{"name": "Start", "entry": "StartNode"}],
+}
+
+
+class StartupBudgetTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        project = Path(self.temp_dir.name)
+        (project / "interface.json").write_text(json.dumps(INTERFACE), "utf-8")
+        (project / "page" / "assets").mkdir(parents=True)
+        (project / "page" / "index.html").write_text("<html></html>", "utf-8")
+        (project / "resource" / "base" / "pipeline").mkdir(parents=True)
+
+    def run_main(self, budget_ms: str) -> subprocess.CompletedProcess:
+        env = {
+            **os.environ,
+            "MWU_STARTUP_BUDGET_MS": budget_ms,
+            # 避免启动时打开浏览器
+            "BROWSER": "true",
+        }
+        return subprocess.run(
+            [sys.executable, str(MAIN), "--profile-exit"],
+            cwd=self.temp_dir.name,
+            env=env,
+            capture_output=True,
+            timeout=120,
+        )
+
+    def read_report(self) -> dict:
+        path = Path(self.temp_dir.name) / "config" / "startup_profile.json"
+        return json.loads(path.read_text("utf-8"))
+
+    def test_within_budget_exits_zero(self):
+        result = self.run_main("600000")
+        self.assertEqual(result.returncode, 0, result.stderr.decode(errors="replace"))
+        report = self.read_report()
+        self.assertFalse(report["over_budget"])
+        self.assertTrue(report["imports"])
+
+    def test_over_budget_exits_one(self):
+        result = self.run_main("1")
+        self.assertEqual(result.returncode, 1, result.stderr.decode(errors="replace"))
+        self.assertTrue(self.read_report()["over_budget"])
+
+
+if __name__ == "__main__":
+    unittest.main()